@@ -0,0 +1,126 @@
+"""Registration analytics rollups for the Tantra25 admin dashboard.
+
+Registrations are loaded once into a columnar pandas frame. Rollups (per
+hour, college, department and event, paid vs unpaid) are kept as
+materialized Series: each refresh only queries registrations newer than the
+last seen `registration_date`, rolls up that batch with vectorized group-bys
+and adds it onto the stored totals. A periodic full rebuild picks up edits
+and deletions, which the incremental path cannot see. If Firestore is
+unavailable, the last rollups are served and marked `stale`.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+import pandas as pd
+
+from firestore_guard import guard, FirestoreUnavailable
+from registrations import all_registrations
+
+_COLUMNS = ['registration_date', 'email', 'college', 'department', 'event_id',
+            'event_name', 'transaction_id']
+_ROLLUPS = ('per_hour', 'per_college', 'per_department', 'per_event', 'paid')
+
+
+class RegistrationRollups:
+    """Materialized registration rollups refreshed incrementally from Firestore."""
+
+    def __init__(self, db, min_refresh: float = 15.0, full_rebuild: float = 600.0):
+        self._db = db
+        self._min_refresh = min_refresh
+        self._full_rebuild = full_rebuild
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _state(self):
+        return (self._emails, dict(self._rollups), self._high_water, self._total)
+
+    def _reset(self):
+        self._emails = pd.Series(dtype='string')
+        self._rollups = {name: pd.Series(dtype='int64') for name in _ROLLUPS}
+        self._high_water = None
+        self._total = 0
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+
+    def snapshot(self, force: bool = False, top: int = 25) -> Dict[str, Any]:
+        """Return the rollups as JSON-ready dicts, refreshing them if they are stale."""
+        with self._lock:
+            now = time.monotonic()
+            stale = False
+            if force or now - self._last_rebuild >= self._full_rebuild:
+                previous = self._state()
+                self._reset()
+                self._last_rebuild = now
+                try:
+                    self._refresh()
+                except FirestoreUnavailable:
+                    self._emails, self._rollups, self._high_water, self._total = previous
+                    stale = True
+            elif now - self._last_refresh >= self._min_refresh:
+                try:
+                    self._refresh()
+                except FirestoreUnavailable:
+                    stale = True
+
+            r = self._rollups
+            paid = int(r['paid'].get(True, 0))
+            unpaid = int(r['paid'].get(False, 0))
+            return {
+                'total_registrations': self._total,
+                'unique_participants': int(self._emails.nunique()),
+                'paid': paid,
+                'unpaid': unpaid,
+                'paid_ratio': round(paid / self._total, 4) if self._total else 0.0,
+                'per_hour': {k.isoformat(): int(v) for k, v in r['per_hour'].sort_index().items()},
+                'per_college': _top(r['per_college'], top),
+                'per_department': _top(r['per_department'], None),
+                'per_event': _top(r['per_event'], None),
+                'as_of': self._high_water.isoformat() if self._high_water is not None else None,
+                'stale': stale,
+            }
+
+    def _refresh(self):
+        q = all_registrations(self._db).select(_COLUMNS)
+        if self._high_water is not None:
+            q = q.where('registration_date', '>', self._high_water.to_pydatetime())
+        rows = [doc.to_dict() or {} for doc in guard.stream(q, kind='scan')]
+        self._last_refresh = time.monotonic()
+        if not rows:
+            return
+
+        df = pd.DataFrame.from_records(rows, columns=_COLUMNS)
+        df['registration_date'] = pd.to_datetime(df['registration_date'], utc=True, errors='coerce')
+        df['college'] = df['college'].fillna('').astype('string').str.strip().str.title()
+        df['department'] = df['department'].fillna('').astype('string')
+        df['event_name'] = df['event_name'].fillna('').astype('string')
+        df['email'] = df['email'].fillna('').astype('string').str.strip().str.lower()
+        df['paid'] = df['transaction_id'].fillna('').astype('string').str.strip() != ''
+
+        batch = {
+            'per_hour': df['registration_date'].dt.floor('h').value_counts(),
+            'per_college': df.loc[df['college'] != '', 'college'].value_counts(),
+            'per_department': df['department'].value_counts(),
+            'per_event': df['event_name'].value_counts(),
+            'paid': df['paid'].value_counts(),
+        }
+        for name, counts in batch.items():
+            self._rollups[name] = self._rollups[name].add(counts, fill_value=0).astype('int64')
+
+        emails = df.loc[df['email'] != '', 'email']
+        self._emails = pd.concat([self._emails, emails], ignore_index=True).drop_duplicates()
+        self._total += len(df)
+        newest = df['registration_date'].max()
+        if pd.notna(newest) and (self._high_water is None or newest > self._high_water):
+            self._high_water = newest
+        elif self._high_water is None:
+            # Nothing dated yet: still move past what was counted so it is not re-read.
+            self._high_water = pd.Timestamp(0, tz='UTC')
+
+
+def _top(series, n):
+    series = series.sort_values(ascending=False)
+    if n:
+        series = series.head(n)
+    return {str(k): int(v) for k, v in series.items()}
@@ -12,17 +12,34 @@ temporary file and sets GOOGLE_APPLICATION_CREDENTIALS before exec'ing gunicorn.
 """
 
 from flask import Flask, render_template, request, redirect, url_for, send_file, Response, jsonify
+from markupsafe import Markup
 import firebase_admin
 from firebase_admin import credentials, firestore
+from collections import Counter
 from datetime import datetime
+import hashlib
 import json
 import re
 import io
 import os
+import tempfile
 import uuid
-from werkzeug.utils import secure_filename
 from typing import List, Dict
 
+from catalog_store import CatalogStore
+from search_index import EventSearchIndex
+from participant_index import ParticipantIndex, LOOKUP_FIELDS
+from transaction_ids import reserve_in_batch, normalize_tx
+from fest_export import write_fest_workbook
+from profiling import init_profiling
+from uploads import save_upload, is_hashed_name, collect_garbage, IMMUTABLE_CACHE_CONTROL
+from live_feed import LiveFeed
+from bulk_import import run_import, allocate_event_ids, max_numeric_id
+from models import Department, Event, Registration
+from firestore_guard import guard, deadline, FirestoreUnavailable
+from registrations import partition_queries, registration_ref, event_department
+from google.api_core.exceptions import AlreadyExists
+
 try:
     import openpyxl
     _ = getattr(openpyxl, '__version__', None)
@@ -60,6 +77,33 @@ app.config['UPLOAD_QR_FOLDER'] = UPLOAD_QR_FOLDER
 app.config['UPLOAD_EVENT_FOLDER'] = UPLOAD_EVENT_FOLDER
 app.config['UPLOAD_LOGO_FOLDER'] = UPLOAD_LOGO_FOLDER
 
+_UPLOAD_URL_PREFIXES = ('/static/qr/', '/static/event_images/', '/static/logos/')
+
+
+@app.after_request
+def _immutable_uploads(response):
+    # Uploads are stored under their content hash, so a URL never changes content.
+    path = request.path
+    if response.status_code == 200 and path.startswith(_UPLOAD_URL_PREFIXES) \
+            and is_hashed_name(path.rsplit('/', 1)[-1]):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+# On-demand profiling: send `X-Profile: $PROFILE_TOKEN` (or ?__profile=...) to
+# profile one request; PROFILE_SAMPLE_RATE=N profiles N% of all requests.
+init_profiling(app)
+
+
+@app.errorhandler(FirestoreUnavailable)
+def _firestore_unavailable(e):
+    # Raised by writes (and reads with no stale copy) while Firestore is failing
+    # or the circuit breaker is open: answer fast instead of holding the thread.
+    message = 'The database is temporarily unavailable. Please retry shortly.'
+    headers = {'Retry-After': '10'}
+    if request.path.startswith('/api/') or request.accept_mimetypes.best == 'application/json':
+        return jsonify({'status': 'fail', 'error': message}), 503, headers
+    return Response(message, status=503, headers=headers)
+
 
 # -------------------- Firebase initialization --------------------
 # The app supports three ways to provide Firebase credentials:
@@ -125,36 +169,48 @@ else:
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
+# Departments/events are read from a snapshot shared by all gunicorn workers;
+# only the process holding the catalog lock listens to Firestore.
+catalog_store = CatalogStore(db)
+
+# Event search index, re-indexed incrementally whenever a new catalog version loads.
+event_index = EventSearchIndex()
+catalog_store.on_change(event_index.update)
+
+# Registration desk lookups (email / phone / transaction id). The registrations
+# listener is started lazily by the first lookup in each worker.
+participant_index = ParticipantIndex(db)
+
+# Live dashboard (SSE): fed by the listeners above, fanned out to connected admins.
+# Each open stream holds a gthread slot, so the number per worker is capped.
+live_feed = LiveFeed(participant_index, catalog_store,
+                     max_clients=int(os.environ.get('LIVE_MAX_CLIENTS') or 2))
+
+
+def _departments(catalog) -> List[Department]:
+    return [Department.from_dict(d.get('id'), d) for d in catalog.departments]
+
 
 # -------------------- Routes --------------------
 @app.route('/')
+@deadline(5)
 def index():
-    depts = list(db.collection('departments').stream())
+    catalog = catalog_store.current()
+    depts = _departments(catalog)
     total_departments = len(depts)
-    dept_map = {d.id: d.to_dict().get('name', '') for d in depts}
+    dept_map = {d.id: d.name for d in depts}
 
-    events = list(db.collection('events').stream())
+    events = catalog.events
     total_events = len(events)
 
-    # Count registrations (not participants)
-    registrations = list(db.collection('regists').stream())
-    total_registrations = len(registrations)
-    
-    # Count unique participants (by email)
-    unique_participants = set()
-    for reg in registrations:
-        reg_data = reg.to_dict()
-        email = reg_data.get('email', '').strip().lower()
-        if email:
-            unique_participants.add(email)
-    total_unique_participants = len(unique_participants)
+    # Registration counts are not shown here: they are served by /admin/live from the
+    # registrations listener, which only workers serving the desk or dashboard start.
 
     recent_events = []
-    for e in events:
-        ed = e.to_dict()
+    for ed in events:
         did = ed.get('department')
         recent_events.append({
-            'id': e.id,
+            'id': ed['id'],
             'name': ed.get('name'),
             'dept_id': did,
             'dept_name': dept_map.get(did, (did or '')),
@@ -165,10 +221,10 @@ def index():
     dept_list = [
         {
             'id': d.id,
-            'name': d.to_dict().get('name', ''),
-            'logo_url': d.to_dict().get('logo_url', ''),
+            'name': d.name,
+            'logo_url': d.logo_url,
             # Use the filename stored as 'qr_code' in Firestore (we serve files from static/Qr code/)
-            'qr_code': d.to_dict().get('qr_code', '')
+            'qr_code': d.qr_code
         }
         for d in depts
     ]
@@ -181,11 +237,12 @@ def index():
             dept_list.insert(0, dept_list.pop(i))
             break
 
+    departments_html = _cached_fragment(catalog, 'departments', '', lambda: _render_department_cards(catalog))
+
     return render_template('index.html',
+                           departments_html=departments_html,
                            total_departments=total_departments,
                            total_events=total_events,
-                           total_registrations=total_registrations,
-                           total_unique_participants=total_unique_participants,
                            recent_events=recent_events,
                            departments=dept_list)
 
@@ -195,21 +252,11 @@ def dept_events(dept_id):
     if not dept_id:
         return jsonify({'events': []})
     try:
-        ev_q = db.collection('events').where('department', '==', dept_id).stream()
+        ev_q = [e for e in catalog_store.current().events if e.get('department') == dept_id]
     except Exception:
         return jsonify({'events': []})
-    evs = []
-    for e in ev_q:
-        ed = e.to_dict()
-        evs.append({
-            'id': e.id,
-            'name': ed.get('name'),
-            'date': ed.get('date'),
-            'status': ed.get('status', 1),
-            'image_url': ed.get('image_url', ''),
-            'venue': ed.get('venue', ''),
-            'department': ed.get('department', '')
-        })
+    columns = ('id', 'name', 'date', 'status', 'image_url', 'venue', 'department')
+    evs = [dict(zip(columns, Event.from_dict(ed['id'], ed).to_row(columns))) for ed in ev_q]
     return jsonify({'events': evs, 'dept_id': dept_id})
 
 
@@ -221,65 +268,186 @@ def developers_page():
 
 @app.route('/events.html')
 def events_page():
-    # Render the events listing page
-    return render_template('events.html')
+    # Render the events listing page. Tabs and cards are rendered here so the page
+    # paints without waiting for events.js to fetch the catalog; events.js then
+    # binds them and keeps filtering client-side.
+    current = request.args.get('department') or 'all'
+    try:
+        catalog = catalog_store.current()
+    except Exception as e:
+        print(f"Events page catalog error: {e}")
+        return render_template('events.html', event_tabs=None, event_grid=None,
+                               current_department='all', active_department=None)
+    active = catalog.department(current) if current != 'all' else None
+    if active is None:
+        current = 'all'
+    tabs, grid = _cached_fragment(catalog, 'events', current, lambda: _render_event_fragments(catalog, current))
+    return render_template('events.html', event_tabs=tabs, event_grid=grid,
+                           current_department=current, active_department=active)
 
 
 @app.route('/event/<event_id>', methods=['GET'])
+@deadline(3)
 def get_event(event_id):
     if not event_id:
         return jsonify({'error': 'missing id'}), 400
-    ev_doc = db.collection('events').document(event_id).get()
-    if not ev_doc.exists:
-        return jsonify({'error': 'not found'}), 404
-    ed = ev_doc.to_dict()
-    result = {
-        'id': ev_doc.id,
-        'name': ed.get('name'),
-        'description': ed.get('description', ''),
-        'date': ed.get('date', ''),
-        'time': ed.get('time', ''),
-        'venue': ed.get('venue', ''),
-        'image_url': ed.get('image_url', ''),
-        'status': ed.get('status', 1),
-        'department': ed.get('department', ''),
-        'price': ed.get('price', ''),
-        'prize': ed.get('prize', '')
-    }
+    ed = catalog_store.current().event(event_id)
+    if ed is None:
+        # Not in the snapshot yet (just created?) - ask Firestore directly.
+        ev_doc = guard.get(db.collection('events').document(event_id))
+        if not ev_doc.exists:
+            return jsonify({'error': 'not found'}), 404
+        ed = {**ev_doc.to_dict(), 'id': ev_doc.id}
+    result = Event.from_dict(ed['id'], ed).to_json()
+    # Internal fields the event modal does not use.
+    result.pop('payment_qr_url', None)
+    result.pop('created_at', None)
     return jsonify({'event': result})
 
 
+# Field presets for /api/data?mode=summary. The event list only needs enough to
+# draw a card; descriptions and the rest come from /event/<id> on demand.
+SUMMARY_FIELDS = {
+    'departments': ('id', 'name', 'description', 'logo_url', 'qr_code', 'icon', 'color'),
+    'events': ('id', 'name', 'department', 'date', 'image_url', 'status', 'price', 'category'),
+}
+
+# Serialized /api/data bodies keyed by (catalog version, query); emptied on new versions.
+_api_data_cache = {}
+catalog_store.on_change(lambda catalog: _api_data_cache.clear())
+
+
+# Server-rendered page fragments keyed by (catalog version, fragment, department);
+# like _api_data_cache, emptied when a new catalog version loads.
+_fragment_cache = {}
+catalog_store.on_change(lambda catalog: _fragment_cache.clear())
+
+
+def _cached_fragment(catalog, name: str, dept: str, render):
+    key = (catalog.version, name, dept)
+    fragment = _fragment_cache.get(key)
+    if fragment is None:
+        if len(_fragment_cache) >= 256:
+            _fragment_cache.clear()
+        fragment = _fragment_cache[key] = render()
+    return fragment
+
+
+def _summary_catalog(catalog):
+    """The catalog as the pages' scripts load it (/api/data?mode=summary)."""
+    return _shape_catalog(catalog.departments, catalog.events,
+                          SUMMARY_FIELDS['departments'], SUMMARY_FIELDS['events'], None)
+
+
+def _render_event_fragments(catalog, current: str):
+    data = _summary_catalog(catalog)
+    events = data['events'] if current == 'all' else [e for e in data['events'] if e.get('department') == current]
+    tabs = render_template('partials/event_tabs.html', departments=data['departments'], current=current)
+    grid = render_template('partials/event_grid.html', events=events, current=current)
+    return Markup(tabs), Markup(grid)
+
+
+def _render_department_cards(catalog):
+    data = _summary_catalog(catalog)
+    event_counts = Counter(e.get('department') for e in catalog.events)
+    return Markup(render_template('partials/department_cards.html',
+                                  departments=data['departments'], event_counts=event_counts))
+
+
+def _split_param(name: str):
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    return tuple(sorted({p.strip() for p in raw.split(',') if p.strip()}))
+
+
+def _project(items, fields):
+    """Keep only `fields` of each item (always including 'id'); None keeps everything."""
+    if fields is None:
+        return items
+    keep = set(fields) | {'id'}
+    return [{k: v for k, v in item.items() if k in keep} for item in items]
+
+
+def _shape_catalog(departments, events, dept_fields, event_fields, dept_filter):
+    departments = list(departments)
+    # Ensure preferred department ordering
+    preferred_id = 'computer-science-engineering'
+    for i, d in enumerate(departments):
+        if d.get('id') == preferred_id:
+            departments.insert(0, departments.pop(i))
+            break
+    if dept_filter:
+        events = [e for e in events if e.get('department') in dept_filter]
+    return {
+        'departments': _project(departments, dept_fields),
+        'events': _project(events, event_fields),
+    }
+
+
+def _shape_delta(catalog, since, delta, dept_fields, event_fields, dept_filter):
+    """Delta body for /api/data?since=: changed items plus deleted ids per collection."""
+    depts, deleted_depts = delta['departments']
+    events, deleted_events = delta['events']
+    if dept_filter:
+        # An event that moved out of the requested departments is gone for this client.
+        deleted_events = deleted_events + [e['id'] for e in events if e.get('department') not in dept_filter]
+    shaped = _shape_catalog(depts, events, dept_fields, event_fields, dept_filter)
+    shaped.update({
+        'delta': True,
+        'since': since,
+        'version': catalog.version,
+        'epoch': catalog.epoch,
+        'deleted': {'departments': deleted_depts, 'events': deleted_events},
+    })
+    return shaped
+
+
 @app.route('/api/data')
 def api_data():
-    """Return normalized data for frontend (departments, events)."""
+    """Return normalized data for frontend (departments, events).
+
+    Optional query parameters:
+    - mode=summary: only the fields needed by the event list (SUMMARY_FIELDS)
+    - fields=a,b,c: event fields to return (overrides the mode preset)
+    - dept_fields=a,b,c: department fields to return
+    - dept=id1,id2: only events of these departments
+    - since=<version>&epoch=<epoch>: only items added, changed or deleted after
+      that version (`delta: true`, deleted ids under `deleted`). A full body
+      is returned instead when the version is too old or from another epoch.
+    Every body carries the `version` and `epoch` to send back as since/epoch.
+    Each combination is cached per catalog version and served with an ETag.
+    """
+    summary = request.args.get('mode') == 'summary'
+    event_fields = _split_param('fields') or (SUMMARY_FIELDS['events'] if summary else None)
+    dept_fields = _split_param('dept_fields') or (SUMMARY_FIELDS['departments'] if summary else None)
+    dept_filter = _split_param('dept')
     try:
-        # Direct Firestore query without data_provider
-        departments = []
-        depts = db.collection('departments').stream()
-        for dept in depts:
-            dept_data = dept.to_dict()
-            dept_data['id'] = dept.id
-            departments.append(dept_data)
-        
-        events = []
-        evs = db.collection('events').stream()
-        for event in evs:
-            event_data = event.to_dict()
-            event_data['id'] = event.id
-            events.append(event_data)
-        
-        # Ensure preferred department ordering
-        preferred_id = 'computer-science-engineering'
-        for i, d in enumerate(departments):
-            if d.get('id') == preferred_id:
-                departments.insert(0, departments.pop(i))
-                break
-                
-        return jsonify({
-            'departments': departments,
-            'events': events
-        })
-        
+        since = int(request.args['since']) if request.args.get('since') else None
+    except ValueError:
+        since = None
+    epoch = request.args.get('epoch', '')
+    try:
+        catalog = catalog_store.current()
+        delta = catalog.delta(since, epoch) if since is not None else None
+        key = (catalog.version, event_fields, dept_fields, dept_filter, since if delta is not None else None)
+        cached = _api_data_cache.get(key)
+        if cached is None:
+            if delta is not None:
+                shaped = _shape_delta(catalog, since, delta, dept_fields, event_fields, dept_filter)
+            else:
+                shaped = _shape_catalog(catalog.departments, catalog.events, dept_fields, event_fields, dept_filter)
+                shaped.update({'version': catalog.version, 'epoch': catalog.epoch})
+            body = json.dumps(shaped, separators=(',', ':'))
+            if len(_api_data_cache) >= 256:
+                _api_data_cache.clear()
+            cached = _api_data_cache[key] = (body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+        body, etag = cached
+        resp = Response(body, mimetype='application/json')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'public, no-cache'
+        return resp.make_conditional(request)
+
     except Exception as e:
         print(f"API data error: {e}")
         # Fallback to local file
@@ -287,15 +455,73 @@ def api_data():
             data_path = os.path.join(os.path.dirname(__file__), 'data', 'data.json')
             with open(data_path, 'r', encoding='utf-8') as f:
                 raw = json.load(f)
-            return jsonify({
-                'departments': raw.get('departments', []),
-                'events': raw.get('events', [])
-            })
+            return jsonify(_shape_catalog(raw.get('departments', []), raw.get('events', []),
+                                          dept_fields, event_fields, dept_filter))
         except Exception:
             return jsonify({'departments': [], 'events': []})
 
 
+@app.route('/api/events/search')
+def api_events_search():
+    """Ranked, paginated event search: ?q=&dept=&status=&date=&page=&per_page="""
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 20))
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    # Refresh the snapshot first so the index reflects the latest catalog version.
+    catalog_store.current()
+    result = event_index.search(
+        q=request.args.get('q', ''),
+        dept=request.args.get('dept') or None,
+        status=request.args.get('status') or None,
+        date=request.args.get('date') or None,
+        page=page,
+        per_page=per_page,
+    )
+    return jsonify(result)
+
+
+_rollups = None
+
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Registration rollups for dashboard charts (?refresh=1 forces a full rebuild, ?top=N colleges)."""
+    global _rollups
+    try:
+        from analytics import RegistrationRollups
+    except Exception:
+        return jsonify({'error': 'pandas is required for analytics. Install with `pip install pandas`'}), 500
+    if _rollups is None:
+        _rollups = RegistrationRollups(db)
+    try:
+        top = int(request.args.get('top', 25))
+    except ValueError:
+        return jsonify({'error': 'top must be an integer'}), 400
+    force = request.args.get('refresh', '0').lower() in ('1', 'true', 'yes')
+    return jsonify(_rollups.snapshot(force=force, top=top))
+
+
+@app.route('/api/live')
+def api_live():
+    """Server-Sent Events stream of dashboard counts, new registrations and event status changes."""
+    try:
+        stream = live_feed.stream()
+    except OverflowError:
+        return Response('Too many live dashboards open; retry shortly.', status=503,
+                        headers={'Retry-After': '10'})
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/admin/live')
+def live_dashboard():
+    return render_template('live_dashboard.html', counts=live_feed.counts())
+
+
 @app.route('/add_department', methods=['GET', 'POST'])
+@deadline(10)
 def add_department():
     if request.method == 'POST':
         name = request.form['name']
@@ -304,36 +530,32 @@ def add_department():
         logo_file = request.files.get('logo_file')
         logo_url = ""
         if logo_file and logo_file.filename != "":
-            filename = secure_filename(logo_file.filename)
-            path = os.path.join(app.config['UPLOAD_LOGO_FOLDER'], filename)
-            logo_file.save(path)
+            filename = save_upload(logo_file, app.config['UPLOAD_LOGO_FOLDER'])
             logo_url = make_static_url(f'logos/{filename}')
 
         qr_file = request.files.get('qr_file')
         qr_url = ""
         if qr_file and qr_file.filename != "":
-            filename = secure_filename(qr_file.filename)
-            path = os.path.join(app.config['UPLOAD_QR_FOLDER'], filename)
-            qr_file.save(path)
+            filename = save_upload(qr_file, app.config['UPLOAD_QR_FOLDER'])
             qr_url = make_static_url(f'qr/{filename}')
 
-        db.collection('departments').document().set({
+        guard.call(db.collection('departments').document().set, {
             'name': name,
             'description': description,
             'logo_url': logo_url,
             'qr_url': qr_url,
             'created_at': datetime.utcnow()
-        })
+        }, kind='write')
         return redirect(url_for('index'))
-    departments = list(db.collection('departments').stream())
-    dept_list = [(d.id, d.to_dict().get('name', ''), d.to_dict().get('description', '')) for d in departments]
+    dept_list = [(d['id'], d.get('name', ''), d.get('description', '')) for d in catalog_store.current().departments]
     return render_template('add_department.html', departments=dept_list)
 
 
 @app.route('/add_event', methods=['GET', 'POST'])
+@deadline(10)
 def add_event():
-    departments = db.collection('departments').stream()
-    dept_list = [(dept.id, dept.to_dict()['name']) for dept in departments]
+    catalog = catalog_store.current()
+    dept_list = [(d.id, d.name) for d in _departments(catalog)]
 
     if request.method == 'POST':
         dept_id = request.form['dept_id']
@@ -346,32 +568,25 @@ def add_event():
         event_file = request.files.get('event_image')
         image_url = ""
         if event_file and event_file.filename != "":
-            filename = secure_filename(event_file.filename)
-            path = os.path.join(app.config['UPLOAD_EVENT_FOLDER'], filename)
-            event_file.save(path)
+            filename = save_upload(event_file, app.config['UPLOAD_EVENT_FOLDER'])
             image_url = make_static_url(f'event_images/{filename}')
 
-        dept_doc = db.collection('departments').document(dept_id).get()
-        payment_qr_url = ''
-        if dept_doc.exists:
-            payment_qr_url = dept_doc.to_dict().get('qr_url', '')
+        dept_data = catalog.department(dept_id)
+        if dept_data is None:
+            dept_doc = guard.get(db.collection('departments').document(dept_id))
+            dept_data = dept_doc.to_dict() if dept_doc.exists else {}
+        payment_qr_url = Department.from_dict(dept_id, dept_data).qr_url
 
         status = request.form.get('status', 'open')
         price = request.form.get('price', '')
         prize = request.form.get('prize', '')
 
-        all_events = db.collection('events').stream()
-        max_id = 0
-        for ev in all_events:
-            try:
-                eid = int(ev.id)
-                if eid > max_id:
-                    max_id = eid
-            except Exception:
-                continue
-        new_id = max_id + 1
+        # Ids come from the shared counter (the same one bulk imports use),
+        # never lower than the highest id already in the catalog.
+        new_id = guard.call(allocate_event_ids, db, 1, floor=max_numeric_id(catalog.events),
+                            kind='write', pass_timeout=False)[0]
         event_ref = db.collection('events').document(str(new_id))
-        event_ref.set({
+        guard.call(event_ref.set, {
             'id': new_id,
             'department': dept_id,
             'name': name,
@@ -385,30 +600,73 @@ def add_event():
             'prize': prize,
             'status': status,
             'created_at': datetime.utcnow()
-        })
+        }, kind='write')
         return redirect(url_for('index'))
     return render_template('add_event.html', departments=dept_list)
 
 
+@app.route('/bulk_import', methods=['GET', 'POST'])
+@deadline(25)
+def bulk_import():
+    """Create many events (or departments) from one CSV/XLSX upload."""
+    report = None
+    error = ''
+    if request.method == 'POST':
+        target = request.form.get('target', 'events')
+        upload = request.files.get('file')
+        dry_run = request.form.get('dry_run') in ('1', 'on', 'true')
+        if target not in ('events', 'departments'):
+            error = 'Target must be events or departments.'
+        elif not upload or upload.filename == '':
+            error = 'Choose a .csv or .xlsx file to import.'
+        else:
+            # Imports write in many batches; do not start one while Firestore is failing.
+            guard.check()
+            try:
+                report = run_import(db, catalog_store.current(), target, upload.filename,
+                                    upload.stream, dry_run=dry_run).to_dict()
+                report['dry_run'] = dry_run
+            except ValueError as e:
+                error = str(e)
+            except ImportError:
+                error = 'openpyxl is required to import XLSX. Install with `pip install openpyxl`'
+        if request.accept_mimetypes.best == 'application/json':
+            status = 400 if error else (503 if report and report['interrupted'] else 200)
+            return jsonify({'report': report, 'error': error}), status
+    return render_template('bulk_import.html', report=report, error=error)
+
+
+@app.route('/admin/uploads/gc', methods=['POST'])
+def uploads_gc():
+    """Delete content-addressed uploads that no department or event references."""
+    catalog = catalog_store.current()
+    folders = [app.config['UPLOAD_LOGO_FOLDER'], app.config['UPLOAD_QR_FOLDER'], app.config['UPLOAD_EVENT_FOLDER']]
+    removed = collect_garbage(folders, list(catalog.departments) + list(catalog.events))
+    return jsonify({'removed': [os.path.basename(p) for p in removed], 'count': len(removed)})
+
+
 @app.route('/toggle_event_status', methods=['POST'])
+@deadline(5)
 def toggle_event_status():
     event_id = request.form.get('event_id')
     if not event_id:
         return redirect(url_for('index'))
-    ev_doc = db.collection('events').document(event_id).get()
+    ev_ref = db.collection('events').document(event_id)
+    ev_doc = guard.get(ev_ref)
     if not ev_doc.exists:
         return redirect(url_for('index'))
     ev = ev_doc.to_dict()
     current = ev.get('status', 'open')
     new_status = 'close' if current == 'open' else 'open'
-    db.collection('events').document(event_id).update({'status': new_status})
+    guard.call(ev_ref.update, {'status': new_status}, kind='write')
     return redirect(url_for('index'))
 
 
 @app.route('/view_participants', methods=['GET'])
+@deadline(20)
 def view_participants():
-    departments = db.collection('departments').stream()
-    dept_list = [(dept.id, dept.to_dict()['name']) for dept in departments]
+    catalog = catalog_store.current()
+    dept_list = [(d.id, d.name) for d in _departments(catalog)]
     dept_map = {d[0]: d[1] for d in dept_list}
 
     selected_dept_id = request.args.get('dept_id')
@@ -416,52 +674,20 @@ def view_participants():
     
     participants_info = []
 
-    # Build query for registrations (collection renamed to 'regists')
-    reg_query = db.collection('regists')
-    
-    if selected_dept_id:
-        # Get department name from ID
-        dept_doc = db.collection('departments').document(selected_dept_id).get()
-        if dept_doc.exists:
-            dept_name = dept_doc.to_dict().get('name')
-            reg_query = reg_query.where('department', '==', dept_name)
-    
-    if selected_event_id:
-        reg_query = reg_query.where('event_id', '==', selected_event_id)
-
-    # Fetch registrations
-    registrations = reg_query.stream()
-    
-    for reg_doc in registrations:
-        reg = reg_doc.to_dict()
-        
-        participants_info.append({
-            'name': reg.get('name'),
-            'email': reg.get('email'),
-            'phone': reg.get('phone'),
-            'college': reg.get('college'),
-            'branch': reg.get('branch'),
-            'year': reg.get('year'),
-            'event_name': reg.get('event_name'),
-            'dept_name': reg.get('department'),
-            'event_id': reg.get('event_id'),
-            'transaction_id': reg.get('transaction_id'),
-            'registration_date': reg.get('registration_date')
-        })
+    # Read only the partitions of the selected event / department (unknown departments are ignored)
+    dept_filter = selected_dept_id if selected_dept_id in dept_map else None
+    registrations = _registrations(catalog, dept_filter, selected_event_id or None)
 
     # Sort results
     if selected_event_id:
-        participants_info = sorted(participants_info, key=lambda r: (r.get('dept_name', ''), r.get('name', '')))
+        registrations.sort(key=lambda r: (r.department, r.name))
     else:
-        participants_info = sorted(participants_info, key=lambda r: (r.get('dept_name', ''), r.get('event_name', ''), r.get('name', '')))
+        registrations.sort(key=Registration.sort_key)
+    participants_info = [r.to_view() for r in registrations]
 
     # Get events for filter dropdown
-    if selected_dept_id:
-        ev_q = db.collection('events').where('department', '==', selected_dept_id).stream()
-    else:
-        ev_q = db.collection('events').stream()
-    
-    events_for_select = [(e.id, e.to_dict().get('name')) for e in ev_q]
+    events_for_select = [(e['id'], e.get('name')) for e in catalog.events
+                         if not selected_dept_id or event_department(e) == selected_dept_id]
 
     return render_template('view_participants.html',
                            departments=dept_list,
@@ -471,7 +697,64 @@ def view_participants():
                            events_for_select=events_for_select)
 
 
+def _participant_lookup(by: str, q: str, prefix: bool, limit: int = 50):
+    """Run a lookup on one field, or on every lookup field when `by` is empty."""
+    fields = [by] if by else list(LOOKUP_FIELDS)
+    seen = set()
+    results = []
+    for field in fields:
+        for r in participant_index.lookup(field, q, prefix=prefix, limit=limit):
+            if r['id'] not in seen:
+                seen.add(r['id'])
+                results.append(r)
+    return results[:limit]
+
+
+@app.route('/api/participants/lookup')
+def api_participants_lookup():
+    """Look up registrations: ?q=...&by=email|phone|transaction_id&prefix=1"""
+    q = (request.args.get('q') or '').strip()
+    by = (request.args.get('by') or '').strip()
+    prefix = request.args.get('prefix', '0').lower() in ('1', 'true', 'yes')
+    if by and by not in LOOKUP_FIELDS:
+        return jsonify({'error': f'by must be one of {", ".join(LOOKUP_FIELDS)}'}), 400
+    if not q:
+        return jsonify({'results': [], 'count': 0})
+    results = _participant_lookup(by, q, prefix)
+    return jsonify({'results': results, 'count': len(results), 'indexed': participant_index.ready})
+
+
+@app.route('/participants/lookup')
+def participants_lookup():
+    q = (request.args.get('q') or '').strip()
+    by = (request.args.get('by') or '').strip()
+    if by not in LOOKUP_FIELDS:
+        by = ''
+    prefix = request.args.get('prefix', '1').lower() in ('1', 'true', 'yes', 'on')
+    results = _participant_lookup(by, q, prefix) if q else []
+    return render_template('participant_lookup.html',
+                           q=q, by=by, prefix=prefix,
+                           fields=LOOKUP_FIELDS,
+                           participants=results)
+
+
+def _registrations(catalog, dept_id=None, event_id=None):
+    """Registrations of one event, one department or the whole fest, read from their partitions.
+
+    While Firestore is unavailable, they are answered from the participant index.
+    """
+    queries = [q.select(Registration.SELECT) for q in partition_queries(db, catalog, dept_id, event_id)]
+    try:
+        return [Registration.from_snapshot(doc) for doc in guard.stream_all(queries, kind='scan')]
+    except FirestoreUnavailable:
+        if not participant_index.ready:
+            raise
+        print('[firestore] Unavailable; serving registrations from the participant index')
+        return participant_index.records(dept_id=dept_id, event_id=event_id)
+
+
 @app.route('/export_participants')
+@deadline(25)
 def export_participants():
     dept_id = request.args.get('dept_id')
     event_id = request.args.get('event_id')
@@ -485,46 +768,23 @@ def export_participants():
         s = s.strip('_')
         return s or 'value'
 
+    catalog = catalog_store.current()
     dept_name = None
     if dept_id:
-        d = db.collection('departments').document(dept_id).get()
-        if d.exists:
-            dept_name = d.to_dict().get('name')
+        d = catalog.department(dept_id)
+        if d is not None:
+            dept_name = d.get('name')
 
     event_name = None
     if event_id:
-        evdoc = db.collection('events').document(event_id).get()
-        if evdoc.exists:
-            event_name = evdoc.to_dict().get('name')
-        else:
-            event_name = event_id
-
-    # Query registrations collection instead of participants (collection 'regists')
-    q = db.collection('regists')
-    if dept_name:
-        q = q.where('department', '==', dept_name)
-    if event_id:
-        q = q.where('event_id', '==', event_id)
-    
-    rows = []
-    for doc in q.stream():
-        reg = doc.to_dict()
-        rows.append({
-            'name': reg.get('name', ''),
-            'email': reg.get('email', ''),
-            'phone': reg.get('phone', ''),
-            'college': reg.get('college', ''),
-            'branch': reg.get('branch', ''),
-            'year': reg.get('year', ''),
-            'event_name': reg.get('event_name', ''),
-            'dept_name': reg.get('department', ''),
-            'transaction_id': reg.get('transaction_id', ''),
-            'registration_date': reg.get('registration_date', '')
-        })
+        ev = catalog.event(event_id)
+        event_name = ev.get('name') if ev is not None else event_id
 
-    rows = sorted(rows, key=lambda r: (r.get('dept_name', ''), r.get('event_name', ''), r.get('name', '')))
+    registrations = _registrations(catalog, dept_id if dept_name is not None else None, event_id or None)
+    registrations.sort(key=Registration.sort_key)
 
-    headers = ['name', 'email', 'phone', 'college', 'branch', 'year', 'event_name', 'dept_name', 'transaction_id', 'registration_date']
+    headers = list(Registration.EXPORT_COLUMNS)
+    rows = [r.to_row(headers) for r in registrations]
 
     part_dept = _sanitize(dept_name) if dept_name else 'all_departments'
     part_event = _sanitize(event_name) if event_name else 'all_events'
@@ -535,10 +795,7 @@ def export_participants():
             import pandas as pd
         except Exception:
             return Response('pandas is required to export XLSX. Install with `pip install pandas openpyxl`', status=500)
-        df = pd.DataFrame(rows)
-        for h in headers:
-            if h not in df.columns:
-                df[h] = ''
+        df = pd.DataFrame.from_records(rows, columns=headers)
         buf = io.BytesIO()
         df.to_excel(buf, index=False)
         buf.seek(0)
@@ -554,9 +811,7 @@ def export_participants():
             return Response('reportlab is required to export PDF. Install with `pip install reportlab`', status=500)
         buf = io.BytesIO()
         doc = SimpleDocTemplate(buf, pagesize=landscape(A4))
-        data = [headers]
-        for r in rows:
-            data.append([r.get(h, '') for h in headers])
+        data = [headers] + rows
         table = Table(data)
         table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c4dff')),
@@ -571,13 +826,34 @@ def export_participants():
     return Response('Unsupported format. Allowed: xlsx, pdf', status=400)
 
 
+@app.route('/export_all')
+@deadline(25)
+def export_all():
+    """Whole-fest export: one workbook, a sheet per event (or ?by=department) plus a summary."""
+    by = request.args.get('by', 'event').lower()
+    if by not in ('event', 'department'):
+        return Response('Unsupported grouping. Allowed: event, department', status=400)
+    try:
+        import openpyxl  # noqa: F401
+    except Exception:
+        return Response('openpyxl is required to export XLSX. Install with `pip install openpyxl`', status=500)
+
+    guard.check()
+    buf = tempfile.TemporaryFile()
+    write_fest_workbook(db, catalog_store.current(), buf, by=by)
+    buf.seek(0)
+    filename = f'tantra_all_{by}s_{datetime.utcnow():%Y%m%d_%H%M}.xlsx'
+    return send_file(buf, as_attachment=True, download_name=filename, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
 @app.route('/db_content')
+@deadline(20)
 def db_content():
-    departments = db.collection('departments').stream()
+    departments = guard.stream(db.collection('departments'))
     all_data = []
     for dept in departments:
         dept_data = dept.to_dict()
-        events = db.collection('events').where('dept_id', '==', dept.id).stream()
+        events = guard.stream(db.collection('events').where('dept_id', '==', dept.id))
         event_list = []
         for e in events:
             ev = e.to_dict()
@@ -595,8 +871,9 @@ def db_content():
 
 
 @app.route('/fix_events', methods=['GET', 'POST'])
+@deadline(10)
 def fix_events():
-    departments = list(db.collection('departments').stream())
+    departments = guard.stream(db.collection('departments'))
     dept_list = [(d.id, d.to_dict().get('name')) for d in departments]
 
     message = ''
@@ -604,10 +881,10 @@ def fix_events():
         event_id = request.form.get('event_id')
         new_dept = request.form.get('dept_id')
         if event_id and new_dept:
-            db.collection('events').document(event_id).update({'dept_id': new_dept})
+            guard.call(db.collection('events').document(event_id).update, {'dept_id': new_dept}, kind='write')
             message = 'Updated event department.'
 
-    events = list(db.collection('events').stream())
+    events = guard.stream(db.collection('events'))
     dept_ids = {d.id for d in departments}
     problematic = []
     for e in events:
@@ -620,73 +897,116 @@ def fix_events():
 
 
 # -------------------- Registration API --------------------
+TX_ID_RE = re.compile(r'^[A-Za-z0-9]{12,16}$')
+
+# A Firestore batch holds at most 500 writes; each member needs up to two.
+MAX_BATCH_MEMBERS = 100
+
+
+def _participant_fields(data: Dict) -> Dict:
+    """Extract participant info with flexible keys."""
+    return {
+        'name': (data.get('name') or data.get('participant-name') or '').strip(),
+        'email': (data.get('email') or data.get('participant-email') or '').strip().lower(),
+        'phone': (data.get('phone') or data.get('participant-phone') or '').strip(),
+        'college': (data.get('college') or data.get('participant-college') or '').strip(),
+        'branch': (data.get('branch') or data.get('branch/Class') or data.get('participant-branch') or '').strip(),
+        'year': (data.get('year') or data.get('participant-year') or '').strip(),
+        'created_at': datetime.utcnow()
+    }
+
+
+def _resolve_event(event_id: str, catalog):
+    """Return (event dict, department name), or (None, None) if the event does not exist.
+
+    Uses the catalog snapshot first and Firestore only on a miss.
+    """
+    ev = catalog.event(event_id)
+    if ev is None:
+        ev_doc = guard.get(db.collection('events').document(event_id))
+        if not ev_doc.exists:
+            return None, None
+        ev = ev_doc.to_dict()
+
+    dept_id = event_department(ev)
+    dept_name = ''
+    if dept_id:
+        dept = catalog.department(dept_id)
+        if dept is not None:
+            dept_name = dept.get('name', '')
+        else:
+            try:
+                dept_doc = guard.get(db.collection('departments').document(str(dept_id)))
+                if dept_doc.exists:
+                    dept_name = dept_doc.to_dict().get('name', '')
+                else:
+                    dept_name = str(dept_id)
+            except Exception:
+                dept_name = str(dept_id)
+    return ev, dept_name
+
+
+def _registration_doc(participant: Dict, event_id: str, ev: Dict, dept_name: str, tx: str) -> Dict:
+    return {
+        **participant,
+        'event_id': event_id,
+        'event_name': ev.get('name', ''),
+        'department': dept_name,
+        'dept_id': event_department(ev),
+        'transaction_id': tx,
+        'registration_date': datetime.utcnow(),
+        'status': 'confirmed'
+    }
+
+
 @app.route('/api/register', methods=['POST'])
+@deadline(8)
 def api_register():
     try:
         data = request.get_json(force=True)
         if not data:
             return jsonify({'status': 'fail', 'error': 'No data provided'}), 400
 
-        # Extract participant info with flexible keys
-        participant_data = {
-            'name': (data.get('name') or data.get('participant-name') or '').strip(),
-            'email': (data.get('email') or data.get('participant-email') or '').strip().lower(),
-            'phone': (data.get('phone') or data.get('participant-phone') or '').strip(),
-            'college': (data.get('college') or data.get('participant-college') or '').strip(),
-            'branch': (data.get('branch') or data.get('branch/Class') or data.get('participant-branch') or '').strip(),
-            'year': (data.get('year') or data.get('participant-year') or '').strip(),
-            'created_at': datetime.utcnow()
-        }
+        participant_data = _participant_fields(data)
 
         # Get event information
         event_id = str(data.get('event_id') or data.get('eventId') or '').strip()
         if not event_id:
             return jsonify({'status': 'fail', 'error': 'Event ID is required'}), 400
 
-        # Validate event exists and get event details
+        # Validate event exists and get event + department details
         try:
-            ev_doc = db.collection('events').document(event_id).get()
-            if not ev_doc.exists:
-                return jsonify({'status': 'fail', 'error': 'Event not found'}), 404
-            ev = ev_doc.to_dict()
+            ev, dept_name = _resolve_event(event_id, catalog_store.current())
+        except FirestoreUnavailable:
+            raise
         except Exception as e:
             return jsonify({'status': 'fail', 'error': 'Error fetching event details'}), 500
-
-        # Get department name
-        dept_id = ev.get('department') or ev.get('dept_id') or ''
-        dept_name = ''
-        if dept_id:
-            try:
-                dept_doc = db.collection('departments').document(str(dept_id)).get()
-                if dept_doc.exists:
-                    dept_name = dept_doc.to_dict().get('name', '')
-                else:
-                    dept_name = str(dept_id)
-            except Exception:
-                dept_name = str(dept_id)
+        if ev is None:
+            return jsonify({'status': 'fail', 'error': 'Event not found'}), 404
 
         # Validate transaction ID (optional)
         tx = (data.get('transaction_id') or data.get('transactionId') or '').strip()
         if tx:
-            if not re.fullmatch(r'^[A-Za-z0-9]{12,16}$', tx):
+            if not TX_ID_RE.fullmatch(tx):
                 return jsonify({'status': 'fail', 'error': 'Invalid transaction_id format'}), 400
 
-        # Create registration document (NO duplicate checking)
-        registration = {
-            **participant_data,
-            'event_id': event_id,
-            'event_name': ev.get('name', ''),
-            'department': dept_name,
-            'transaction_id': tx,
-            'registration_date': datetime.utcnow(),
-            'status': 'confirmed'
-        }
+        # Create registration document (no email+event duplicate checking)
+        registration = _registration_doc(participant_data, event_id, ev, dept_name, tx)
 
         # Generate a unique ID for the registration
         reg_id = str(uuid.uuid4())
         
-        # Save registration (allow multiple registrations with same email+event)
-        db.collection('regists').document(reg_id).set(registration)
+        # Save registration (allow multiple registrations with same email+event).
+        # The transaction id reservation is created in the same batch, so a
+        # reused transaction id rejects the whole write.
+        batch = db.batch()
+        batch.set(registration_ref(db, event_id, reg_id), registration)
+        if tx:
+            reserve_in_batch(batch, db, tx, reg_id, registration)
+        try:
+            guard.call(batch.commit, kind='write')
+        except AlreadyExists:
+            return jsonify({'status': 'fail', 'error': 'This transaction ID has already been used for another registration'}), 409
 
         return jsonify({
             'status': 'ok', 
@@ -695,6 +1015,89 @@ def api_register():
             'message': 'Successfully registered for the event'
         })
         
+    except FirestoreUnavailable:
+        raise
+    except Exception as e:
+        return jsonify({'status': 'fail', 'error': str(e)}), 500
+
+
+@app.route('/api/register/batch', methods=['POST'])
+@deadline(10)
+def api_register_batch():
+    """Register several participants (a team) in one atomic write.
+
+    Body: {"event_id": ..., "transaction_id": ..., "participants": [{...}, ...]}.
+    Top-level fields are defaults for every member; a member may override
+    them (including event_id, to register for several events at once).
+    Members sharing a transaction id are one team payment: the id is
+    reserved once and the registrations share a team_id.
+    """
+    try:
+        data = request.get_json(force=True)
+        if not data or not isinstance(data.get('participants'), list) or not data['participants']:
+            return jsonify({'status': 'fail', 'error': 'participants list is required'}), 400
+        members = data['participants']
+        if len(members) > MAX_BATCH_MEMBERS:
+            return jsonify({'status': 'fail', 'error': f'At most {MAX_BATCH_MEMBERS} participants per request'}), 400
+
+        shared = {k: v for k, v in data.items() if k != 'participants'}
+        catalog = catalog_store.current()
+        events = {}
+        errors = []
+        registrations = []
+        for i, member in enumerate(members):
+            if not isinstance(member, dict):
+                errors.append({'index': i, 'error': 'Participant must be an object'})
+                continue
+            merged = {**shared, **member}
+            event_id = str(merged.get('event_id') or merged.get('eventId') or '').strip()
+            if not event_id:
+                errors.append({'index': i, 'error': 'Event ID is required'})
+                continue
+            if event_id not in events:
+                events[event_id] = _resolve_event(event_id, catalog)
+            ev, dept_name = events[event_id]
+            if ev is None:
+                errors.append({'index': i, 'error': 'Event not found'})
+                continue
+            tx = (merged.get('transaction_id') or merged.get('transactionId') or '').strip()
+            if tx and not TX_ID_RE.fullmatch(tx):
+                errors.append({'index': i, 'error': 'Invalid transaction_id format'})
+                continue
+            registrations.append(_registration_doc(_participant_fields(merged), event_id, ev, dept_name, tx))
+
+        if errors:
+            return jsonify({'status': 'fail', 'error': 'Validation failed', 'errors': errors}), 400
+
+        team_id = str(uuid.uuid4()) if len(registrations) > 1 else ''
+        reg_ids = []
+        reserved = set()
+        batch = db.batch()
+        for registration in registrations:
+            reg_id = str(uuid.uuid4())
+            reg_ids.append(reg_id)
+            if team_id:
+                registration['team_id'] = team_id
+            batch.set(registration_ref(db, registration['event_id'], reg_id), registration)
+            tx = registration['transaction_id']
+            if tx and normalize_tx(tx) not in reserved:
+                reserved.add(normalize_tx(tx))
+                reserve_in_batch(batch, db, tx, reg_id, registration)
+        try:
+            guard.call(batch.commit, kind='write')
+        except AlreadyExists:
+            return jsonify({'status': 'fail', 'error': 'A transaction ID in this request has already been used for another registration'}), 409
+
+        return jsonify({
+            'status': 'ok',
+            'saved': True,
+            'team_id': team_id,
+            'registration_ids': reg_ids,
+            'message': f'Successfully registered {len(reg_ids)} participant(s)'
+        })
+
+    except FirestoreUnavailable:
+        raise
     except Exception as e:
         return jsonify({'status': 'fail', 'error': str(e)}), 500
 
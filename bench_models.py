@@ -0,0 +1,68 @@
+"""Memory/speed comparison of plain dicts vs the slotted record types in models.py.
+
+Builds N synthetic registrations both ways and reports tracemalloc peak
+memory and timeit build/serialize times:
+
+    python bench_models.py [N]
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from models import Registration
+
+
+def _raw(n):
+    return [(f'reg{i}', {
+        'name': f'Participant {i}',
+        'email': f'p{i}@example.com',
+        'phone': f'98{i:08d}',
+        'college': 'Example College',
+        'branch': 'CSE',
+        'year': '3',
+        'event_id': str(i % 60),
+        'event_name': f'Event {i % 60}',
+        'department': f'Dept {i % 8}',
+        'transaction_id': f'TX{i:010d}',
+        'registration_date': '2025-03-01T10:00:00',
+        'status': 'registered',
+    }) for i in range(n)]
+
+
+def _as_dicts(raw):
+    fields = [name for name, _ in Registration.FIELDS]
+    return [dict({f: data.get(f) or '' for f in fields}, id=doc_id) for doc_id, data in raw]
+
+
+def _as_records(raw):
+    return [Registration.from_dict(doc_id, data) for doc_id, data in raw]
+
+
+def _peak(build, raw):
+    tracemalloc.start()
+    items = build(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return peak
+
+
+def main(n=50000):
+    raw = _raw(n)
+    columns = list(Registration.EXPORT_COLUMNS)
+    dicts = _as_dicts(raw)
+    records = _as_records(raw)
+    print(f'{n} registrations')
+    for label, build, items, row in (
+        ('dict', _as_dicts, dicts, lambda d: [d.get('department' if c == 'dept_name' else c, '') for c in columns]),
+        ('slots', _as_records, records, lambda r: r.to_row(columns)),
+    ):
+        peak = _peak(build, raw)
+        build_s = min(timeit.repeat(lambda: build(raw), number=1, repeat=3))
+        rows_s = min(timeit.repeat(lambda: [row(x) for x in items], number=1, repeat=3))
+        print(f'  {label:<5}  peak {peak / 1e6:7.1f} MB  build {build_s * 1e3:7.1f} ms  to_row {rows_s * 1e3:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,285 @@
+"""Bulk import of events and departments from CSV or XLSX.
+
+Rows are parsed and validated in one pass against the department set of
+the catalog snapshot (departments may be referenced by id or by name).
+Event ids are reserved as one block from a counter document, and all
+valid rows are written with batched commits. Every Firestore call goes
+through `guard`, so a failing backend stops the import with a 503 instead
+of holding the worker. Invalid rows are reported
+with their spreadsheet row number and are not written.
+"""
+
+import csv
+import io
+import re
+import time
+from datetime import date, datetime, time as dt_time
+from typing import Any, Dict, List
+
+from firebase_admin import firestore
+
+from firestore_guard import guard, FirestoreUnavailable
+
+EVENT_COUNTER_DOC = ('meta', 'event_counter')
+
+EVENT_COLUMNS = ('department', 'name', 'description', 'date', 'time', 'venue',
+                 'price', 'prize', 'status', 'image_url', 'category',
+                 'coordinator', 'coordinatorPhone')
+DEPARTMENT_COLUMNS = ('id', 'name', 'description', 'logo_url', 'qr_url', 'qr_code', 'icon', 'color')
+
+EVENT_STATUSES = ('open', 'close', 'spot')
+
+# Firestore allows 500 writes per batch; stay below it.
+BATCH_SIZE = 400
+
+
+def _cell_text(value) -> str:
+    """Text of an XLSX cell, with dates and times in the catalog's formats."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if value.time() == dt_time():
+            return value.date().isoformat()
+        return value.strftime('%Y-%m-%d %I:%M %p')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dt_time):
+        # Event times are free text such as "10:00 AM".
+        return value.strftime('%I:%M %p').lstrip('0')
+    return str(value).strip()
+
+
+def read_rows(filename: str, stream) -> List[Dict[str, str]]:
+    """Parse an uploaded CSV or XLSX file into a list of {header: value} dicts."""
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        try:
+            wb = load_workbook(stream, read_only=True, data_only=True)
+            ws = wb.worksheets[0]
+            rows = ws.iter_rows(values_only=True)
+            headers = [str(h).strip() if h is not None else '' for h in next(rows, [])]
+            result = []
+            for values in rows:
+                if values is None or all(v is None or str(v).strip() == '' for v in values):
+                    continue
+                result.append({h: _cell_text(v) for h, v in zip(headers, values) if h})
+            wb.close()
+        except Exception as e:
+            # Corrupt or non-XLSX upload (BadZipFile, InvalidFileException, ...)
+            raise ValueError(f'Could not read the XLSX file: {e}') from e
+        return result
+    if name.endswith('.csv'):
+        try:
+            text = io.StringIO(stream.read().decode('utf-8-sig'), newline='')
+            # Values beyond the header (e.g. a trailing comma) land under the key None: drop them.
+            rows = [{k.strip(): (v or '').strip() for k, v in row.items() if k is not None}
+                    for row in csv.DictReader(text)]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ValueError(f'Could not read the CSV file: {e}') from e
+        return [row for row in rows if any(row.values())]
+    raise ValueError('Unsupported file type. Upload a .csv or .xlsx file.')
+
+
+def allocate_event_ids(db, count: int, floor: int = 0) -> range:
+    """Reserve `count` consecutive numeric event ids in one transaction.
+
+    `floor` is the highest id known to exist (e.g. from the catalog), so the
+    counter never hands out ids of events created before it existed.
+    """
+    ref = db.collection(EVENT_COUNTER_DOC[0]).document(EVENT_COUNTER_DOC[1])
+
+    @firestore.transactional
+    def _reserve(transaction):
+        snap = ref.get(transaction=transaction)
+        last = (snap.to_dict() or {}).get('last_id', 0) if snap.exists else 0
+        start = max(int(last), floor) + 1
+        transaction.set(ref, {'last_id': start + count - 1, 'updated_at': datetime.utcnow()}, merge=True)
+        return start
+
+    start = _reserve(db.transaction())
+    return range(start, start + count)
+
+
+def max_numeric_id(items) -> int:
+    best = 0
+    for item in items:
+        try:
+            best = max(best, int(item.get('id')))
+        except (TypeError, ValueError):
+            continue
+    return best
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def _price(value: str):
+    if value == '':
+        return ''
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+class ImportReport:
+    """Outcome of one import: created ids, per-row errors and throughput."""
+
+    def __init__(self, target: str, total_rows: int):
+        self.target = target
+        self.total_rows = total_rows
+        self.created: List[str] = []
+        self.errors: List[Dict[str, Any]] = []
+        # Set when Firestore failed part-way; `created` then lists what was written.
+        self.interrupted = ''
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def error(self, row_number: int, message: str):
+        self.errors.append({'row': row_number, 'error': message})
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'target': self.target,
+            'rows': self.total_rows,
+            'valid': self.total_rows - len(self.errors),
+            'created': len(self.created),
+            'created_ids': self.created,
+            'errors': self.errors,
+            'interrupted': self.interrupted,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.total_rows / self.elapsed, 1) if self.elapsed else None,
+        }
+
+
+def _write_batches(db, report: ImportReport, writes):
+    """Commit (ref, doc, created_id) writes in batches; ids count as created once their batch is committed.
+
+    If Firestore fails, the batches committed so far stay written and the
+    report says where the import stopped.
+    """
+    batch, pending = db.batch(), []
+    try:
+        for ref, doc, created_id in writes:
+            batch.set(ref, doc)
+            pending.append(created_id)
+            if len(pending) >= BATCH_SIZE:
+                guard.call(batch.commit, kind='write')
+                report.created.extend(pending)
+                batch, pending = db.batch(), []
+        if pending:
+            guard.call(batch.commit, kind='write')
+            report.created.extend(pending)
+    except FirestoreUnavailable as e:
+        report.interrupted = (f'Firestore unavailable after {len(report.created)} of {len(writes)} '
+                              f'writes; the rest were not written: {e}')
+
+
+def import_events(db, catalog, rows: List[Dict[str, str]], dry_run: bool = False) -> ImportReport:
+    report = ImportReport('events', len(rows))
+    depts_by_key = {}
+    for d in catalog.departments:
+        depts_by_key[str(d['id']).lower()] = d
+        if d.get('name'):
+            depts_by_key[d['name'].strip().lower()] = d
+    existing = {(str(e.get('department')), (e.get('name') or '').strip().lower()) for e in catalog.events}
+
+    valid = []
+    for i, row in enumerate(rows):
+        row_number = i + 2  # header is row 1
+        dept = depts_by_key.get((row.get('department') or '').strip().lower())
+        name = (row.get('name') or '').strip()
+        status = (row.get('status') or 'open').strip().lower()
+        price = _price(row.get('price', ''))
+        if not name:
+            report.error(row_number, 'name is required')
+        elif dept is None:
+            report.error(row_number, f"unknown department '{row.get('department', '')}'")
+        elif status not in EVENT_STATUSES:
+            report.error(row_number, f"status must be one of {', '.join(EVENT_STATUSES)}")
+        elif price is None:
+            report.error(row_number, f"price '{row.get('price')}' is not a number")
+        elif (str(dept['id']), name.lower()) in existing:
+            report.error(row_number, f"event '{name}' already exists in {dept.get('name', dept['id'])}")
+        else:
+            existing.add((str(dept['id']), name.lower()))
+            doc = {c: row.get(c, '') for c in EVENT_COLUMNS}
+            doc.update({
+                'department': dept['id'],
+                'name': name,
+                'status': status,
+                'price': price,
+                'payment_qr_url': dept.get('qr_url', ''),
+            })
+            valid.append(doc)
+
+    if valid and not dry_run:
+        try:
+            ids = guard.call(allocate_event_ids, db, len(valid), floor=max_numeric_id(catalog.events),
+                             kind='write', pass_timeout=False)
+        except FirestoreUnavailable as e:
+            report.interrupted = f'Firestore unavailable, nothing was written: {e}'
+            ids = []
+        now = datetime.utcnow()
+        writes = []
+        for new_id, doc in zip(ids, valid):
+            doc['id'] = new_id
+            doc['created_at'] = now
+            writes.append((db.collection('events').document(str(new_id)), doc, str(new_id)))
+        _write_batches(db, report, writes)
+    report.finish()
+    return report
+
+
+def import_departments(db, catalog, rows: List[Dict[str, str]], dry_run: bool = False) -> ImportReport:
+    report = ImportReport('departments', len(rows))
+    taken_ids = {str(d['id']) for d in catalog.departments}
+    taken_names = {(d.get('name') or '').strip().lower() for d in catalog.departments}
+
+    valid = []
+    for i, row in enumerate(rows):
+        row_number = i + 2
+        name = (row.get('name') or '').strip()
+        dept_id = (row.get('id') or '').strip() or _slug(name)
+        if not name:
+            report.error(row_number, 'name is required')
+        elif name.lower() in taken_names:
+            report.error(row_number, f"department '{name}' already exists")
+        elif not dept_id or dept_id in taken_ids:
+            report.error(row_number, f"department id '{dept_id}' is already used")
+        else:
+            taken_ids.add(dept_id)
+            taken_names.add(name.lower())
+            doc = {c: row.get(c, '') for c in DEPARTMENT_COLUMNS if c != 'id'}
+            doc['name'] = name
+            valid.append((dept_id, doc))
+
+    if valid and not dry_run:
+        now = datetime.utcnow()
+        writes = []
+        for dept_id, doc in valid:
+            doc['created_at'] = now
+            writes.append((db.collection('departments').document(dept_id), doc, dept_id))
+        _write_batches(db, report, writes)
+    report.finish()
+    return report
+
+
+def run_import(db, catalog, target: str, filename: str, stream, dry_run: bool = False) -> ImportReport:
+    """Parse, validate and write one upload; the report times the whole run, parsing included."""
+    started = time.perf_counter()
+    rows = read_rows(filename, stream)
+    if target == 'departments':
+        report = import_departments(db, catalog, rows, dry_run=dry_run)
+    else:
+        report = import_events(db, catalog, rows, dry_run=dry_run)
+    report.started = started
+    report.finish()
+    return report
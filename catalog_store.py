@@ -0,0 +1,329 @@
+"""Shared catalog snapshot for Tantra25 worker processes.
+
+start.py runs several gunicorn workers. Instead of every worker streaming the
+`departments` and `events` collections (and keeping its own copy warm), one
+process holds a file lock, owns the Firestore snapshot listeners and publishes
+the catalog to a snapshot file in shared memory (/dev/shm when available).
+All workers mmap that file and only decode it when its version changes.
+
+Snapshot layout: a 16-byte header (magic, version, payload length) followed by
+the JSON payload. New versions are written to a temp file and renamed over the
+snapshot, so a reader always maps one complete version.
+
+What is shared, and what is not: Firestore listener load and catalog
+fetches are flat in the number of workers. Memory is not. The snapshot is
+mmapped, but each worker `json.loads` the payload into its own dicts when the
+version changes. Each worker also builds its own derived state from it (the
+event search index, the /api/data body cache and the page fragment cache).
+Per-worker catalog memory therefore still grows with the worker count; only
+the decode is limited to one per version. Routes and the index work on plain
+dicts, so a format they could read in place would mean rewriting them all.
+Until the writer has published its first snapshot, each worker reads the
+collections once on its own (`_fetch_direct`).
+
+For delta sync (/api/data?since=) the payload also carries `_meta`: the
+version at which each department/event last changed, tombstones for deleted
+ids, and an `epoch` that changes whenever version numbers restart (no
+previous snapshot to continue from). Versions older than `floor` can no
+longer be answered with a delta.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from firestore_guard import guard
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows dev machines: there is only one process, so it is always the writer.
+    FCNTL_AVAILABLE = False
+
+
+_MAGIC = b'TCAT'
+_HEADER = struct.Struct('<4sQI')
+_COLLECTIONS = ('departments', 'events')
+
+# Tombstones kept per collection; older deletions raise the delta floor.
+MAX_TOMBSTONES = 1000
+
+
+def _default_path() -> str:
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'tantra_catalog.snap')
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class Catalog:
+    """One immutable version of the departments/events catalog."""
+
+    __slots__ = ('version', 'departments', 'events', '_dept_by_id', '_event_by_id',
+                 'epoch', 'floor', '_versions', '_deleted')
+
+    def __init__(self, version: int, departments: List[Dict[str, Any]], events: List[Dict[str, Any]],
+                 meta: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.departments = departments
+        self.events = events
+        self._dept_by_id = {str(d.get('id')): d for d in departments}
+        self._event_by_id = {str(e.get('id')): e for e in events}
+        meta = meta or {}
+        self.epoch = meta.get('epoch', '')
+        self.floor = meta.get('floor', version)
+        self._versions = meta.get('versions', {})
+        self._deleted = meta.get('deleted', {})
+
+    def department(self, dept_id) -> Optional[Dict[str, Any]]:
+        return self._dept_by_id.get(str(dept_id))
+
+    def event(self, event_id) -> Optional[Dict[str, Any]]:
+        return self._event_by_id.get(str(event_id))
+
+    def delta(self, since: int, epoch: str) -> Optional[Dict[str, Any]]:
+        """Items changed and ids deleted after version `since` of `epoch`.
+
+        Returns {collection: (changed items, deleted ids)}, or None when the
+        client has to reload everything (other epoch, or older than `floor`).
+        """
+        if not self.epoch or epoch != self.epoch or not self.floor <= since <= self.version:
+            return None
+        out = {}
+        for name, items in (('departments', self.departments), ('events', self.events)):
+            versions = self._versions.get(name, {})
+            changed = [item for item in items if versions.get(str(item.get('id')), self.version) > since]
+            deleted = [iid for iid, v in self._deleted.get(name, {}).items() if v > since]
+            out[name] = (changed, deleted)
+        return out
+
+
+class CatalogStore:
+    """Single-writer, multi-reader catalog shared through a snapshot file."""
+
+    def __init__(self, db, path: str = None, claim_interval: float = 5.0):
+        self._db = db
+        self._path = path or os.environ.get('CATALOG_SNAPSHOT_PATH') or _default_path()
+        self._claim_interval = claim_interval
+        self._lock = threading.Lock()
+        # The departments and events watches call back on their own threads.
+        self._publish_lock = threading.Lock()
+        self._catalog = None
+        self._stamp = None
+        self._last_claim = 0.0
+        self._lock_fd = None
+        self._watches = []
+        self._docs = {name: None for name in _COLLECTIONS}
+        self._published = 0
+        self._meta = None
+        self._digests = {name: {} for name in _COLLECTIONS}
+        self._subscribers = []
+
+    @property
+    def is_writer(self) -> bool:
+        return bool(self._watches)
+
+    def on_change(self, fn: Callable[[Catalog], None]):
+        """Register fn(catalog), called in this process whenever a new version is loaded."""
+        self._subscribers.append(fn)
+        return fn
+
+    def current(self) -> Catalog:
+        """Return the newest published catalog, loading it on version change only."""
+        self._maybe_claim_writer()
+        try:
+            st = os.stat(self._path)
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+
+        if stamp is not None and stamp != self._stamp:
+            self._load(stamp)
+        elif self._catalog is None:
+            # No snapshot published yet (writer still warming up): read once directly.
+            with self._lock:
+                if self._catalog is None:
+                    self._swap(self._fetch_direct())
+        return self._catalog
+
+    # -------------------- Reader side --------------------
+    def _load(self, stamp):
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            skip = self._catalog.version if self._catalog is not None else None
+            try:
+                snapshot = self._read_snapshot(skip_version=skip)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"[catalog] Failed to read snapshot {self._path}: {e}")
+                return
+            if snapshot is None:
+                return
+            version, payload = snapshot
+            self._stamp = stamp
+            if payload is None:
+                return
+            catalog = Catalog(version, payload.get('departments', []), payload.get('events', []),
+                              payload.get('_meta'))
+            self._swap(catalog)
+
+    def _read_snapshot(self, skip_version: Optional[int] = None):
+        """(version, payload) of the snapshot file; payload is None if it is `skip_version`.
+
+        Returns None when the file is not a catalog snapshot.
+        """
+        with open(self._path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, length = _HEADER.unpack_from(mm, 0)
+                if magic != _MAGIC:
+                    return None
+                if version == skip_version:
+                    return version, None
+                return version, json.loads(mm[_HEADER.size:_HEADER.size + length])
+
+    def _swap(self, catalog: Catalog):
+        self._catalog = catalog
+        for fn in list(self._subscribers):
+            try:
+                fn(catalog)
+            except Exception as e:
+                print(f"[catalog] Subscriber error: {e}")
+
+    def _fetch_direct(self) -> Catalog:
+        data = {}
+        for name in _COLLECTIONS:
+            docs = []
+            for doc in guard.stream(self._db.collection(name), kind='scan'):
+                item = doc.to_dict()
+                item['id'] = doc.id
+                docs.append(item)
+            data[name] = json.loads(json.dumps(docs, default=_json_default))
+        return Catalog(0, data['departments'], data['events'])
+
+    # -------------------- Writer side --------------------
+    def _maybe_claim_writer(self):
+        if self.is_writer:
+            return
+        now = time.monotonic()
+        if now - self._last_claim < self._claim_interval:
+            return
+        with self._lock:
+            if self.is_writer or now - self._last_claim < self._claim_interval:
+                return
+            self._last_claim = now
+            if FCNTL_AVAILABLE:
+                fd = os.open(self._path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    return
+                self._lock_fd = fd
+            print(f"[catalog] pid {os.getpid()} is the catalog writer ({self._path})")
+            for name in _COLLECTIONS:
+                self._watches.append(
+                    self._db.collection(name).on_snapshot(self._make_callback(name)))
+
+    def _make_callback(self, name: str):
+        def _on_snapshot(docs, changes, read_time):
+            items = []
+            for doc in docs:
+                item = doc.to_dict() or {}
+                item['id'] = doc.id
+                items.append(item)
+            self._docs[name] = items
+            if all(v is not None for v in self._docs.values()):
+                self._publish()
+        return _on_snapshot
+
+    def _track_changes(self, version: int) -> Dict[str, Any]:
+        """Stamp changed items with `version` and record tombstones for deleted ones."""
+        if self._meta is None:
+            self._meta = self._seed_meta(version)
+        meta = self._meta
+        for name in _COLLECTIONS:
+            digests = self._digests[name]
+            versions = meta['versions'][name]
+            deleted = meta['deleted'][name]
+            seen = set()
+            for item in self._docs[name]:
+                iid = str(item.get('id'))
+                seen.add(iid)
+                digest = json.dumps(item, default=_json_default, sort_keys=True)
+                if digests.get(iid) != digest:
+                    digests[iid] = digest
+                    versions[iid] = version
+                    deleted.pop(iid, None)
+            for iid in [i for i in versions if i not in seen]:
+                del versions[iid]
+                digests.pop(iid, None)
+                deleted[iid] = version
+            if len(deleted) > MAX_TOMBSTONES:
+                oldest = sorted(deleted.items(), key=lambda kv: kv[1])[:len(deleted) - MAX_TOMBSTONES]
+                for iid, v in oldest:
+                    del deleted[iid]
+                    meta['floor'] = max(meta['floor'], v)
+        return meta
+
+    def _seed_meta(self, version: int) -> Dict[str, Any]:
+        """Continue the change history of the snapshot on disk (e.g. after a writer handover)."""
+        try:
+            snapshot = self._read_snapshot()
+        except (OSError, ValueError, struct.error):
+            snapshot = None
+        payload = snapshot[1] if snapshot else None
+        meta = (payload or {}).get('_meta')
+        if not meta or not meta.get('epoch'):
+            print(f"[catalog] Starting a new delta epoch at version {version}")
+            return {'epoch': os.urandom(6).hex(), 'floor': version,
+                    'versions': {name: {} for name in _COLLECTIONS},
+                    'deleted': {name: {} for name in _COLLECTIONS}}
+        for name in _COLLECTIONS:
+            for item in payload.get(name, []):
+                self._digests[name][str(item.get('id'))] = json.dumps(item, sort_keys=True)
+            meta['versions'].setdefault(name, {})
+            meta['deleted'].setdefault(name, {})
+        return meta
+
+    def _publish(self):
+        with self._publish_lock:
+            self._publish_locked()
+
+    def _publish_locked(self):
+        version = max(self._published, self._disk_version()) + 1
+        docs = {name: self._docs[name] for name in _COLLECTIONS}
+        docs['_meta'] = self._track_changes(version)
+        payload = json.dumps(docs, default=_json_default, separators=(',', ':')).encode('utf-8')
+        directory = os.path.dirname(self._path) or '.'
+        fd, tmp = tempfile.mkstemp(prefix='.tantra_catalog_', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, version, len(payload)))
+                f.write(payload)
+            os.replace(tmp, self._path)
+        except Exception as e:
+            print(f"[catalog] Failed to publish snapshot: {e}")
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self._published = version
+
+    def _disk_version(self) -> int:
+        try:
+            with open(self._path, 'rb') as f:
+                magic, version, _ = _HEADER.unpack(f.read(_HEADER.size))
+            return version if magic == _MAGIC else 0
+        except (OSError, struct.error):
+            return 0
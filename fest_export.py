@@ -0,0 +1,115 @@
+"""Whole-fest participant export for Tantra25.
+
+Builds one XLSX workbook with a summary sheet and one sheet per event (or per
+department) from a single streaming pass over all registration partitions. The workbook is
+opened in openpyxl write-only mode, so each row is flushed to the sheet's
+temp file as soon as it is appended and memory does not grow with the
+number of registrations.
+"""
+
+import re
+from typing import Dict
+
+from firestore_guard import guard
+from models import Registration
+from registrations import all_registrations
+
+EXPORT_HEADERS = list(Registration.EXPORT_COLUMNS)
+
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def _sheet_title(name: str, used: set) -> str:
+    """Excel sheet titles: max 31 chars, no []:*?/\\ and unique (case-insensitive)."""
+    base = _INVALID_SHEET_CHARS.sub(' ', name or '').strip() or 'Sheet'
+    title = base[:31]
+    n = 2
+    while title.lower() in used:
+        suffix = f' ({n})'
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def _cell(value):
+    # Excel cannot store timezone-aware datetimes; Firestore returns UTC-aware ones.
+    if hasattr(value, 'tzinfo') and getattr(value, 'tzinfo', None) is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def write_fest_workbook(db, catalog, fileobj, by: str = 'event') -> Dict[str, int]:
+    """Stream every registration once into a workbook written to `fileobj`.
+
+    `by` is 'event' (one sheet per event) or 'department' (one per department).
+    Returns the row count per sheet title.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    summary = wb.create_sheet('Summary')
+    used = {'summary'}
+
+    dept_names = {d['id']: d.get('name', '') for d in catalog.departments}
+    dept_order = {d['id']: i for i, d in enumerate(catalog.departments)}
+
+    # Create the sheets up front in a stable order (department, then event name);
+    # write-only workbooks keep sheets in creation order.
+    sheets = {}
+    titles = {}
+    if by == 'department':
+        groups = [(str(d['id']), d.get('name') or d['id'], d.get('name', '')) for d in catalog.departments]
+        key_of = lambda reg: str(reg.dept_id)
+    else:
+        events = sorted(catalog.events, key=lambda e: (dept_order.get(e.get('department'), len(dept_order)),
+                                                         (e.get('name') or '').lower()))
+        groups = [(str(e['id']), e.get('name') or str(e['id']), dept_names.get(e.get('department'), ''))
+                  for e in events]
+        key_of = lambda reg: str(reg.event_id)
+
+    for key, label, dept_label in groups:
+        ws = wb.create_sheet(_sheet_title(label, used))
+        ws.append(EXPORT_HEADERS)
+        sheets[key] = ws
+        titles[key] = (ws.title, dept_label)
+
+    other = None
+    counts: Dict[str, int] = {key: 0 for key in sheets}
+    other_count = 0
+
+    def _write_rows(**kw):
+        nonlocal other, other_count
+        for doc in q.stream(**kw):
+            reg = Registration.from_snapshot(doc)
+            row = [_cell(v) for v in reg.to_row(EXPORT_HEADERS)]
+            key = key_of(reg)
+            ws = sheets.get(key)
+            if ws is None:
+                if other is None:
+                    other = wb.create_sheet(_sheet_title('Other', used))
+                    other.append(EXPORT_HEADERS)
+                other.append(row)
+                other_count += 1
+                continue
+            ws.append(row)
+            counts[key] += 1
+
+    # Rows are appended while the query streams (guard.stream would hold them all);
+    # the scan budget covers the whole pass.
+    q = all_registrations(db).select(Registration.SELECT)
+    guard.call(_write_rows, kind='scan')
+
+    summary.append(['sheet', 'department', 'registrations'])
+    result = {}
+    for key, _, _ in groups:
+        title, dept_label = titles[key]
+        summary.append([title, dept_label, counts[key]])
+        result[title] = counts[key]
+    if other is not None:
+        summary.append([other.title, '', other_count])
+        result[other.title] = other_count
+    summary.append(['TOTAL', '', sum(result.values())])
+
+    wb.save(fileobj)
+    return result
@@ -0,0 +1,230 @@
+"""Deadlines, retries and a circuit breaker around Firestore calls.
+
+Every Firestore call made while serving a request goes through `guard`:
+
+- It gets a `timeout=` of at most the per-kind budget (read / write / scan).
+  The remaining budget of the route also caps it, when the route is wrapped
+  in `@deadline(seconds)`.
+- Reads are retried on transient errors within that budget. Writes are sent
+  once, because retrying a commit that may already have been applied could
+  report a spurious AlreadyExists for transaction id reservations.
+- A circuit breaker counts failed and slow calls. After `failure_threshold`
+  of them in a row it opens. "Slow" means using most of the per-kind budget.
+  Scans are never counted as slow, since large healthy scans take long. A
+  timeout caused by the route's own deadline, not by the budget, is not a
+  backend failure either. While open, calls fail immediately with
+  `FirestoreUnavailable` instead of waiting on a degraded backend. After
+  `reset_after` seconds one probe call is let through to close it again.
+
+Routes catch `FirestoreUnavailable`. Reads fall back to stale data (the
+catalog snapshot or the participant index). Writes answer with a fast 503.
+
+Budgets can be tuned with FIRESTORE_TIMEOUT_READ, FIRESTORE_TIMEOUT_WRITE
+and FIRESTORE_TIMEOUT_SCAN (seconds). FIRESTORE_BREAKER_FAILURES and
+FIRESTORE_BREAKER_RESET configure the breaker.
+"""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from google.api_core import exceptions as gexc
+from google.api_core import retry as gretry
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+BUDGETS = {
+    'read': _env_float('FIRESTORE_TIMEOUT_READ', 3.0),
+    'write': _env_float('FIRESTORE_TIMEOUT_WRITE', 5.0),
+    # Full-collection scans (exports, fallback counts).
+    'scan': _env_float('FIRESTORE_TIMEOUT_SCAN', 20.0),
+}
+
+# Errors that say nothing about the backend's health (bad request, missing
+# document, reused transaction id...) do not count against the breaker.
+_CLIENT_ERRORS = (gexc.AlreadyExists, gexc.NotFound, gexc.InvalidArgument,
+                  gexc.FailedPrecondition, gexc.PermissionDenied, gexc.Unauthenticated,
+                  gexc.Aborted)
+
+# Errors raised when a call runs out of its timeout (RetryError: the retry budget ran out).
+_TIMEOUT_ERRORS = (gexc.DeadlineExceeded, gexc.RetryError, TimeoutError)
+
+
+class FirestoreUnavailable(Exception):
+    """Firestore is failing, too slow, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed."""
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._probing or time.monotonic() - self._opened_at >= self.reset_after:
+                return 'half-open'
+            return 'open'
+
+    def allow(self) -> bool:
+        """True if a call may be attempted now (at most one probe while half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_after:
+                return False
+            self._probing = True
+            return True
+
+    def release(self):
+        """End a call without a verdict; a half-open breaker lets the next call probe."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool):
+        with self._lock:
+            if ok:
+                if self._opened_at is not None:
+                    print('[firestore] Circuit closed')
+                self._failures = 0
+                self._opened_at = None
+                self._probing = False
+                return
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if self._opened_at is None:
+                    print(f'[firestore] Circuit opened after {self._failures} failed or slow calls')
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+_local = threading.local()
+
+
+def deadline(seconds: float):
+    """Route decorator: all guarded Firestore calls of the request share `seconds` in total."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            previous = getattr(_local, 'deadline', None)
+            _local.deadline = time.monotonic() + seconds
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _local.deadline = previous
+        return wrapper
+    return decorator
+
+
+class FirestoreGuard:
+    """Applies budgets, retry policy and the circuit breaker to Firestore calls."""
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, budgets=None, slow_ratio: float = 0.8):
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(_env_float('FIRESTORE_BREAKER_FAILURES', 5)),
+            reset_after=_env_float('FIRESTORE_BREAKER_RESET', 30.0))
+        self.budgets = dict(BUDGETS, **(budgets or {}))
+        # A call that succeeds but uses more than this share of its budget counts as slow.
+        self.slow_ratio = slow_ratio
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.state != 'open'
+
+    def check(self):
+        """Fail fast before multi-call work (imports, full exports) while the breaker is open."""
+        if not self.available:
+            raise FirestoreUnavailable('circuit open')
+
+    def timeout(self, kind: str) -> float:
+        budget = self.budgets[kind]
+        end = getattr(_local, 'deadline', None)
+        if end is not None:
+            budget = min(budget, end - time.monotonic())
+        return budget
+
+    def call(self, fn: Callable, *args, kind: str = 'read', pass_timeout: bool = True, **kwargs):
+        """Run fn(*args, **kwargs, timeout=..., retry=...) under the breaker.
+
+        pass_timeout=False is for callables that take no timeout/retry
+        arguments (e.g. transactional functions); they are still timed and
+        counted by the breaker.
+        """
+        budget = self.budgets[kind]
+        timeout = self.timeout(kind)
+        if timeout <= 0:
+            raise FirestoreUnavailable('request deadline exceeded')
+        if not self.breaker.allow():
+            raise FirestoreUnavailable('circuit open')
+        if pass_timeout:
+            kwargs['timeout'] = timeout
+            kwargs['retry'] = self._retry(timeout) if kind != 'write' else None
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except _CLIENT_ERRORS:
+            self.breaker.record(True)
+            raise
+        except (gexc.GoogleAPIError, TimeoutError, ConnectionError) as e:
+            if timeout < budget and isinstance(e, _TIMEOUT_ERRORS):
+                # The route's deadline cut the budget short: says nothing about the backend.
+                self.breaker.release()
+            else:
+                self.breaker.record(False)
+            raise FirestoreUnavailable(str(e)) from e
+        except Exception:
+            # Unknown error: count it, so a failed half-open probe cannot leave the breaker stuck.
+            self.breaker.record(False)
+            raise
+        slow = kind != 'scan' and time.monotonic() - started >= budget * self.slow_ratio
+        self.breaker.record(not slow)
+        return result
+
+    def get(self, ref, kind: str = 'read'):
+        """DocumentReference.get() with a deadline."""
+        return self.call(ref.get, kind=kind)
+
+    def stream(self, query, kind: str = 'read') -> list:
+        """Run a query to completion; the timeout covers the whole stream."""
+        return self.call(lambda **kw: list(query.stream(**kw)), kind=kind)
+
+    def stream_all(self, queries, kind: str = 'read', workers: int = 8) -> list:
+        """Run several queries in parallel (sharing the caller's deadline) and concatenate the results."""
+        queries = list(queries)
+        if len(queries) <= 1:
+            return self.stream(queries[0], kind=kind) if queries else []
+        end = getattr(_local, 'deadline', None)
+
+        def _run(query):
+            _local.deadline = end
+            try:
+                return self.stream(query, kind=kind)
+            finally:
+                _local.deadline = None
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(queries))) as pool:
+            return [doc for docs in pool.map(_run, queries) for doc in docs]
+
+    def _retry(self, timeout: float):
+        return gretry.Retry(predicate=gretry.if_transient_error, initial=0.1,
+                            maximum=1.0, multiplier=2.0, timeout=timeout)
+
+
+guard = FirestoreGuard()
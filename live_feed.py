@@ -0,0 +1,157 @@
+"""Server-Sent Events feed for the live admin dashboard.
+
+Each worker has one LiveFeed. It is fed by listeners the worker already
+runs (the registrations listener of ParticipantIndex and the shared catalog)
+and fans every update out to the admins connected to that worker, so load
+grows with the rate of change, not with the number of open dashboards.
+
+Messages sent to the browser:
+- `counts`: registration / unique participant / event / department totals
+- `registration`: one new or updated registration
+- `event_status`: an event whose status changed
+
+Catalog versions are only loaded when something calls
+`catalog_store.current()`, so open streams poll it every `_POLL_SECONDS`;
+otherwise a worker serving only dashboards would never see status changes.
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator
+
+_HEARTBEAT_SECONDS = 15
+_POLL_SECONDS = 1.0
+
+
+def _format(event: str, data: Any) -> str:
+    return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+class _ClientStream:
+    """Response body of one client; frees its slot on close, even if it was never iterated."""
+
+    def __init__(self, gen: Iterator[str], release: Callable[[], None]):
+        self._gen = gen
+        self._release = release
+
+    def __iter__(self):
+        return self._gen
+
+    def close(self):
+        try:
+            self._gen.close()
+        finally:
+            self._release()
+
+
+class LiveFeed:
+    """Fan-out of dashboard updates to connected SSE clients."""
+
+    def __init__(self, participant_index, catalog_store, max_clients: int = 2, queue_size: int = 100):
+        self._participants = participant_index
+        self._catalog_store = catalog_store
+        self._max_clients = max_clients
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._slots = 0  # streams handed out and not yet closed (<= max_clients)
+        self._statuses = None
+        participant_index.subscribe(self._on_registrations)
+        catalog_store.on_change(self._on_catalog)
+
+    def counts(self) -> Dict[str, int]:
+        catalog = self._catalog_store.current()
+        counts = self._participants.stats()
+        counts['total_events'] = len(catalog.events)
+        counts['total_departments'] = len(catalog.departments)
+        return counts
+
+    def stream(self) -> _ClientStream:
+        """SSE messages for one client; raises OverflowError when the worker is full.
+
+        The slot is reserved here, so concurrent connects cannot all pass the
+        check, and released when the response is closed.
+        """
+        with self._lock:
+            if self._slots >= self._max_clients:
+                raise OverflowError('too many live dashboard clients on this worker')
+            self._slots += 1
+        q = queue.Queue(maxsize=self._queue_size)
+        released = []
+
+        def _release():
+            with self._lock:
+                self._clients.discard(q)
+                if not released:
+                    released.append(True)
+                    self._slots -= 1
+
+        def _gen():
+            with self._lock:
+                self._clients.add(q)
+            try:
+                yield 'retry: 5000\n\n'
+                yield _format('counts', self.counts())
+                last_sent = time.monotonic()
+                while True:
+                    self._poll_catalog()
+                    try:
+                        message = q.get(timeout=_POLL_SECONDS)
+                    except queue.Empty:
+                        if time.monotonic() - last_sent < _HEARTBEAT_SECONDS:
+                            continue
+                        # Comment line: keeps proxies from closing an idle connection.
+                        message = ': keep-alive\n\n'
+                    last_sent = time.monotonic()
+                    yield message
+            finally:
+                _release()
+
+        try:
+            self._participants.start()
+            self._participants.wait_ready(timeout=10)
+        except Exception:
+            _release()
+            raise
+        return _ClientStream(_gen(), _release)
+
+    def _poll_catalog(self):
+        # Loads a newly published catalog version; _on_catalog then queues the status changes.
+        try:
+            self._catalog_store.current()
+        except Exception as e:
+            print(f"[live] Catalog poll failed: {e}")
+
+    def _publish(self, message: str):
+        with self._lock:
+            clients = list(self._clients)
+        for q in clients:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop the update; the next `counts` message resyncs it.
+                pass
+
+    def _on_registrations(self, added, removed):
+        if not self._clients:
+            return
+        for reg in added:
+            self._publish(_format('registration', reg.to_json()))
+        self._publish(_format('counts', self.counts()))
+
+    def _on_catalog(self, catalog):
+        statuses = {str(e.get('id')): e.get('status', 1) for e in catalog.events}
+        previous, self._statuses = self._statuses, statuses
+        if previous is None or not self._clients:
+            return
+        for eid, status in statuses.items():
+            if eid in previous and previous[eid] != status:
+                ev = catalog.event(eid) or {}
+                self._publish(_format('event_status', {'id': eid, 'name': ev.get('name'), 'status': status}))
+        if len(statuses) != len(previous):
+            counts = self._participants.stats()
+            counts['total_events'] = len(catalog.events)
+            counts['total_departments'] = len(catalog.departments)
+            self._publish(_format('counts', counts))
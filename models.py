@@ -0,0 +1,112 @@
+"""Record types for Tantra25 Firestore documents.
+
+`Department`, `Event` and `Registration` are compact `__slots__` classes.
+A Firestore snapshot is decoded once (`from_snapshot` / `from_dict`) with
+the defaults defined here, and routes serialize through `to_json` (dict for
+jsonify / templates) or `to_row` (list for XLSX/PDF exports) instead of each
+building its own dict of `.get()` calls.
+
+Slotted instances carry no per-object `__dict__`, so keeping tens of
+thousands of registrations in memory (participant index, exports) costs a
+fraction of the equivalent dicts; see bench_models.py.
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List
+
+
+# attrgetter per (record type, column tuple), built on first use by to_row.
+_ROW_GETTERS: Dict[Any, attrgetter] = {}
+
+
+class Record:
+    """Base class: subclasses define FIELDS as (name, default) pairs and matching __slots__."""
+
+    __slots__ = ('id',)
+    FIELDS = ()
+    # Export/view column names that differ from the stored field name.
+    ALIASES: Dict[str, str] = {}
+
+    @classmethod
+    def from_dict(cls, doc_id, data: Dict[str, Any]):
+        obj = cls.__new__(cls)
+        obj.id = str(doc_id) if doc_id is not None else ''
+        get = data.get
+        for name, default in cls.FIELDS:
+            value = get(name)
+            setattr(obj, name, default if value is None else value)
+        return obj
+
+    @classmethod
+    def from_snapshot(cls, snap):
+        return cls.from_dict(snap.id, snap.to_dict() or {})
+
+    def to_json(self) -> Dict[str, Any]:
+        out = {'id': self.id}
+        for name, _ in self.FIELDS:
+            out[name] = getattr(self, name)
+        return out
+
+    def to_row(self, columns: Iterable[str]) -> List[Any]:
+        columns = tuple(columns)
+        getter = _ROW_GETTERS.get((type(self), columns))
+        if getter is None:
+            aliases = self.ALIASES
+            getter = attrgetter(*[aliases.get(c, c) for c in columns])
+            _ROW_GETTERS[(type(self), columns)] = getter
+        values = getter(self)
+        return list(values) if len(columns) != 1 else [values]
+
+    def __repr__(self):
+        return f'{type(self).__name__}(id={self.id!r}, name={getattr(self, "name", None)!r})'
+
+
+class Department(Record):
+    FIELDS = (
+        ('name', ''), ('description', ''), ('logo_url', ''), ('qr_url', ''),
+        ('qr_code', ''), ('icon', ''), ('color', ''), ('created_at', None),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class Event(Record):
+    FIELDS = (
+        ('department', ''), ('name', ''), ('description', ''), ('date', ''), ('time', ''),
+        ('venue', ''), ('image_url', ''), ('payment_qr_url', ''), ('price', ''), ('prize', ''),
+        ('status', 1), ('category', ''), ('coordinator', ''), ('coordinatorPhone', ''),
+        ('created_at', None),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+    @classmethod
+    def from_dict(cls, doc_id, data: Dict[str, Any]):
+        obj = super().from_dict(doc_id, data)
+        # Older documents used 'dept_id' for the department reference.
+        if not obj.department and data.get('dept_id'):
+            obj.department = data['dept_id']
+        return obj
+
+
+class Registration(Record):
+    FIELDS = (
+        ('name', ''), ('email', ''), ('phone', ''), ('college', ''), ('branch', ''),
+        ('year', ''), ('event_id', ''), ('event_name', ''), ('department', ''), ('dept_id', ''),
+        ('transaction_id', ''), ('registration_date', ''), ('status', ''), ('team_id', ''),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+    ALIASES = {'dept_name': 'department'}
+
+    # Columns of the participant list and exports, in display order.
+    EXPORT_COLUMNS = ('name', 'email', 'phone', 'college', 'branch', 'year',
+                      'event_name', 'dept_name', 'transaction_id', 'registration_date')
+    VIEW_COLUMNS = ('name', 'email', 'phone', 'college', 'branch', 'year',
+                    'event_name', 'dept_name', 'event_id', 'transaction_id', 'registration_date')
+
+    # Only these are needed to build a Registration; pass to Query.select().
+    SELECT = tuple(name for name, _ in FIELDS)
+
+    def to_view(self, columns: Iterable[str] = VIEW_COLUMNS) -> Dict[str, Any]:
+        return dict(zip(columns, self.to_row(columns)))
+
+    def sort_key(self):
+        return (self.department, self.event_name, self.name)
@@ -0,0 +1,194 @@
+"""In-process participant lookup index for the registration desk.
+
+Keeps email, phone and transaction id keys of every registration in hash
+maps (exact lookups) and sorted key lists (prefix lookups via bisect). The
+index is fed by a Firestore snapshot listener on the `registrations`
+collection group, so it stays current while registrations are still
+arriving. The listener is started on first use and is the one registrations
+listener per worker: the dashboard counts and the live feed are served from
+it as well.
+"""
+
+import bisect
+import re
+import threading
+from typing import Any, Dict, List
+
+from firestore_guard import guard, FirestoreUnavailable
+from models import Registration
+from registrations import all_registrations
+
+LOOKUP_FIELDS = ('email', 'phone', 'transaction_id')
+
+
+def normalize(field: str, value) -> str:
+    """Normalize a lookup key the same way for stored documents and queries."""
+    if value is None:
+        return ''
+    value = str(value).strip()
+    if field == 'email':
+        return value.lower()
+    if field == 'phone':
+        digits = re.sub(r'\D', '', value)
+        # Drop a country code such as +91 so "98765..." matches "+91 98765...".
+        return digits[-10:] if len(digits) > 10 else digits
+    if field == 'transaction_id':
+        return value.upper()
+    return value
+
+
+class ParticipantIndex:
+    """Exact and prefix lookups over registrations by email, phone and transaction id."""
+
+    def __init__(self, db):
+        self._db = db
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._exact = {f: {} for f in LOOKUP_FIELDS}   # field -> key -> set(reg_id)
+        self._sorted = {f: [] for f in LOOKUP_FIELDS}  # field -> sorted keys
+        self._records = {}                             # reg_id -> Registration
+        self._watch = None
+        self._ready = threading.Event()
+        self._subscribers = []
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def subscribe(self, fn):
+        """Register fn(added, removed_ids) for changes after the initial load.
+
+        `added` holds the Registration records that were added or modified. Called on the
+        listener thread, so fn must return quickly.
+        """
+        self._subscribers.append(fn)
+        return fn
+
+    def stats(self) -> Dict[str, int]:
+        """Registration and unique-participant (by email) counts."""
+        with self._lock:
+            return {'total_registrations': len(self._records),
+                    'total_unique_participants': len(self._exact['email'])}
+
+    def records(self, dept_id: str = None, event_id: str = None) -> List[Registration]:
+        """Indexed registrations, optionally filtered like the partition queries of the admin views.
+
+        Used as a stale stand-in for those queries while Firestore is unavailable.
+        """
+        with self._lock:
+            regs = list(self._records.values())
+        if dept_id is not None:
+            regs = [r for r in regs if r.dept_id == dept_id]
+        if event_id is not None:
+            regs = [r for r in regs if r.event_id == event_id]
+        return regs
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Block until the initial snapshot has been indexed (or timeout)."""
+        return self._ready.wait(timeout=timeout)
+
+    def start(self):
+        """Start the snapshot listener once; later calls are no-ops."""
+        with self._start_lock:
+            if self._watch is None:
+                self._watch = all_registrations(self._db).on_snapshot(self._on_snapshot)
+
+    def lookup(self, field: str, query: str, prefix: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return registrations whose `field` equals (or starts with) `query`."""
+        if field not in LOOKUP_FIELDS:
+            raise ValueError(f'unknown lookup field: {field}')
+        key = normalize(field, query)
+        if not key:
+            return []
+        self.start()
+        if not self._ready.wait(timeout=5):
+            return self._lookup_firestore(field, key, prefix, limit)
+
+        with self._lock:
+            if not prefix:
+                ids = list(self._exact[field].get(key, ()))
+            else:
+                keys = self._sorted[field]
+                ids = []
+                i = bisect.bisect_left(keys, key)
+                while i < len(keys) and keys[i].startswith(key) and len(ids) < limit:
+                    ids.extend(self._exact[field][keys[i]])
+                    i += 1
+            results = [self._records[rid] for rid in ids[:limit]]
+        results.sort(key=lambda r: str(r.name).lower())
+        return [r.to_json() for r in results]
+
+    # -------------------- Listener --------------------
+    def _on_snapshot(self, docs, changes, read_time):
+        added, removed = [], []
+        initial = not self._ready.is_set()
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                self._drop(doc.id)
+                if change.type.name == 'REMOVED':
+                    removed.append(doc.id)
+                else:
+                    # The initial snapshot holds every registration: sort the keys
+                    # once afterwards instead of inserting them one by one.
+                    self._add(doc.id, doc.to_dict() or {}, keep_sorted=not initial)
+                    added.append(self._records[doc.id])
+            if initial:
+                for field in LOOKUP_FIELDS:
+                    self._sorted[field] = sorted(self._exact[field])
+        self._ready.set()
+        if initial:
+            return
+        for fn in list(self._subscribers):
+            try:
+                fn(added, removed)
+            except Exception as e:
+                print(f"[participants] Subscriber error: {e}")
+
+    def _add(self, reg_id: str, reg: Dict[str, Any], keep_sorted: bool = True):
+        record = self._records[reg_id] = Registration.from_dict(reg_id, reg)
+        for field in LOOKUP_FIELDS:
+            key = normalize(field, getattr(record, field))
+            if not key:
+                continue
+            bucket = self._exact[field].get(key)
+            if bucket is None:
+                bucket = self._exact[field][key] = set()
+                if keep_sorted:
+                    bisect.insort(self._sorted[field], key)
+            bucket.add(reg_id)
+
+    def _drop(self, reg_id: str):
+        old = self._records.pop(reg_id, None)
+        if old is None:
+            return
+        for field in LOOKUP_FIELDS:
+            key = normalize(field, getattr(old, field))
+            bucket = self._exact[field].get(key)
+            if not bucket:
+                continue
+            bucket.discard(reg_id)
+            if not bucket:
+                del self._exact[field][key]
+                keys = self._sorted[field]
+                i = bisect.bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+
+    # -------------------- Fallback --------------------
+    def _lookup_firestore(self, field: str, key: str, prefix: bool, limit: int) -> List[Dict[str, Any]]:
+        """Query Firestore directly (single-field indexes) while the listener warms up.
+
+        Stored values are not normalized, so this only matches keys stored in
+        their canonical form (lower-case email, upper-case transaction id).
+        """
+        q = all_registrations(self._db)
+        if prefix:
+            q = q.where(field, '>=', key).where(field, '<', key + '\uf8ff')
+        else:
+            q = q.where(field, '==', key)
+        try:
+            docs = guard.stream(q.select(Registration.SELECT).limit(limit))
+        except FirestoreUnavailable:
+            return []
+        return [Registration.from_snapshot(doc).to_json() for doc in docs]
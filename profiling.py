@@ -0,0 +1,230 @@
+"""On-demand request profiling for production debugging.
+
+A single request is profiled when it carries the profiling token, either as
+the `X-Profile` header or the `__profile` query parameter; the token is set
+with the PROFILE_TOKEN environment variable (profiling on demand is off when
+it is unset). `X-Profile-Mode` / `__profile_mode` picks the profiler:
+
+- `sample` (default): a stdlib sampling profiler that snapshots the request
+  thread's stack every few milliseconds and writes collapsed stacks, the
+  input format of flamegraph.pl and speedscope;
+- `cprofile`: deterministic cProfile, written as a .prof file for pstats or
+  snakeviz.
+
+Both also write a .txt summary in which time spent inside Firestore client
+code is attributed to the app line that made the call. Profiles go to a
+rotating on-disk store (PROFILE_DIR, newest PROFILE_KEEP files kept) and the
+profile id is returned in the `X-Profile-Id` response header. PROFILE_SAMPLE_RATE
+(a percentage) additionally samples that share of all requests.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from flask import Response, abort, g, request, send_from_directory
+
+_FIRESTORE_MARKERS = ('google/cloud/firestore', 'google\\cloud\\firestore', 'grpc')
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self._target = thread_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self.stacks = Counter()
+        self.samples = 0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})|{code.co_filename}')
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text: 'frame;frame;frame count' per line."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            lines.append(';'.join(f.split('|', 1)[0] for f in stack) + f' {count}')
+        return '\n'.join(lines) + '\n'
+
+    def firestore_spans(self) -> Dict[str, float]:
+        """Milliseconds spent in Firestore client code, keyed by the app frame that called it."""
+        spans = Counter()
+        for stack, count in self.stacks.items():
+            caller = None
+            for entry in stack:
+                label, filename = entry.split('|', 1)
+                if any(m in filename for m in _FIRESTORE_MARKERS):
+                    spans[caller or '<unknown>'] += count
+                    break
+                if filename.startswith(_APP_DIR):
+                    caller = label
+        return {k: round(v * self._interval * 1000, 1) for k, v in spans.most_common()}
+
+
+class ProfileStore:
+    """Rotating directory of profile files."""
+
+    def __init__(self, directory: str, keep: int = 200):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, profile_id: str, files: Dict[str, bytes]):
+        for suffix, data in files.items():
+            with open(os.path.join(self.directory, f'{profile_id}{suffix}'), 'wb') as f:
+                f.write(data)
+        self._rotate()
+
+    def list(self) -> List[str]:
+        names = [n for n in os.listdir(self.directory) if not n.startswith('.')]
+        return sorted(names, reverse=True)
+
+    def _rotate(self):
+        ids = sorted({n.split('.', 1)[0] for n in self.list()}, reverse=True)
+        for old in ids[self.keep:]:
+            for name in os.listdir(self.directory):
+                if name.startswith(old + '.'):
+                    try:
+                        os.unlink(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+
+def _profile_id() -> str:
+    path = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+    return f"{time.strftime('%Y%m%dT%H%M%S')}_{request.method}_{path[:40]}_{uuid.uuid4().hex[:6]}"
+
+
+def init_profiling(app, token: Optional[str] = None, sample_rate: Optional[float] = None,
+                   directory: Optional[str] = None, keep: Optional[int] = None):
+    """Register the profiling hooks and the /_profiles routes on `app`."""
+    token = token if token is not None else os.environ.get('PROFILE_TOKEN', '')
+    sample_rate = sample_rate if sample_rate is not None else float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
+    directory = directory or os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'tantra_profiles')
+    keep = keep or int(os.environ.get('PROFILE_KEEP') or 200)
+    store = ProfileStore(directory, keep)
+
+    def _authorized() -> bool:
+        supplied = request.headers.get('X-Profile') or request.args.get('__profile')
+        return bool(token) and bool(supplied) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+    @app.before_request
+    def _start_profile():
+        requested = _authorized()
+        if not requested and not (sample_rate and random.random() * 100 < sample_rate):
+            return
+        if request.path.startswith('/_profiles'):
+            return
+        mode = (request.headers.get('X-Profile-Mode') or request.args.get('__profile_mode') or 'sample').lower()
+        g._profile = {'mode': mode, 'start': time.perf_counter()}
+        if mode == 'cprofile':
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                # Another request in this process is already under cProfile; sample instead.
+                mode = g._profile['mode'] = 'sample'
+            else:
+                g._profile['cprofile'] = prof
+        if mode != 'cprofile':
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            g._profile['sampler'] = sampler
+
+    @app.after_request
+    def _finish_profile(response):
+        state = g.pop('_profile', None)
+        if state is None:
+            return response
+        elapsed_ms = (time.perf_counter() - state['start']) * 1000
+        profile_id = _profile_id()
+        # request.path, not full_path: the query string may carry the token.
+        header = f'{request.method} {request.path} -> {response.status_code} in {elapsed_ms:.1f} ms\n'
+        files = {}
+        if 'cprofile' in state:
+            prof = state['cprofile']
+            prof.disable()
+            out = io.StringIO()
+            stats = pstats.Stats(prof, stream=out)
+            stats.sort_stats('cumulative').print_stats(60)
+            firestore_ms = sum(st[2] for fn, st in stats.stats.items()
+                               if any(m in fn[0] for m in _FIRESTORE_MARKERS)) * 1000
+            fd, tmp = tempfile.mkstemp(suffix='.prof')
+            os.close(fd)
+            prof.dump_stats(tmp)
+            with open(tmp, 'rb') as f:
+                files['.prof'] = f.read()
+            os.unlink(tmp)
+            summary = header + f'Firestore client time (self): {firestore_ms:.1f} ms\n\n' + out.getvalue()
+        else:
+            sampler = state['sampler']
+            sampler.stop()
+            spans = sampler.firestore_spans()
+            files['.collapsed'] = sampler.collapsed().encode('utf-8')
+            lines = [header, f'{sampler.samples} samples\n', 'Firestore time by calling app frame:\n']
+            lines += [f'  {ms:8.1f} ms  {caller}\n' for caller, ms in spans.items()] or ['  (none)\n']
+            summary = ''.join(lines)
+        files['.txt'] = summary.encode('utf-8')
+        try:
+            store.save(profile_id, files)
+            response.headers['X-Profile-Id'] = profile_id
+        except OSError as e:
+            print(f'[profiling] Failed to store profile: {e}')
+        return response
+
+    @app.teardown_request
+    def _abort_profile(exc):
+        # after_request is skipped when the view raises; make sure nothing keeps running.
+        state = g.pop('_profile', None)
+        if state is None:
+            return
+        if 'cprofile' in state:
+            state['cprofile'].disable()
+        else:
+            state['sampler'].stop()
+
+    @app.route('/_profiles')
+    def list_profiles():
+        if not _authorized():
+            abort(404)
+        return Response('\n'.join(store.list()) + '\n', mimetype='text/plain')
+
+    @app.route('/_profiles/<path:name>')
+    def get_profile(name):
+        if not _authorized():
+            abort(404)
+        return send_from_directory(store.directory, name, as_attachment=not name.endswith('.txt'))
+
+    return store
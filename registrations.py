@@ -0,0 +1,137 @@
+"""Partitioned registration storage for Tantra25.
+
+Registrations live under the event they belong to:
+
+    events/<event_id>/registrations/<registration_id>
+
+and carry the stable `event_id` and `dept_id` of that event (besides the
+display names). A per-event read touches only that event's partition. A
+per-department read queries the partitions of the department's events,
+taken from the catalog, in parallel. Renaming a department therefore no
+longer changes which registrations belong to it. Fest-wide reads
+(exports, analytics, the participant index listener) use the
+`registrations` collection group.
+
+Collection-group queries with a filter or order need single-field indexes
+with collection-group scope. Enable them in the Firebase console for
+`registrations.registration_date` (analytics, backfill) and for
+`email`, `phone` and `transaction_id` (desk lookups while the index warms up).
+
+Registrations saved in the old flat `regists` collection are copied into
+their partitions by the migration, which reads `regists` in parallel
+partitions and writes batches:
+
+    python registrations.py --migrate [--workers 8] [--delete]
+
+Document ids are kept, so transaction id reservations stay valid and the
+migration can be re-run safely. Pass --delete once the copy is verified to
+remove the old documents.
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+SUBCOLLECTION = 'registrations'
+LEGACY_COLLECTION = 'regists'
+
+# Firestore allows 500 writes per batch; a moved document takes two (set + delete).
+_BATCH_WRITES = 400
+
+
+def event_registrations(db, event_id):
+    """The partition of one event."""
+    return db.collection('events').document(str(event_id)).collection(SUBCOLLECTION)
+
+
+def registration_ref(db, event_id, reg_id: str):
+    return event_registrations(db, event_id).document(reg_id)
+
+
+def all_registrations(db):
+    """Every registration of the fest (collection group over all partitions)."""
+    return db.collection_group(SUBCOLLECTION)
+
+
+def partition_queries(db, catalog, dept_id: str = None, event_id: str = None) -> List[Any]:
+    """Queries covering the registrations of one event, one department, or the whole fest."""
+    if event_id:
+        q = event_registrations(db, event_id)
+        if dept_id:
+            q = q.where('dept_id', '==', dept_id)
+        return [q]
+    if dept_id:
+        return [event_registrations(db, e['id']) for e in catalog.events if event_department(e) == dept_id]
+    return [all_registrations(db)]
+
+
+def event_department(ev: Dict[str, Any]) -> str:
+    """Stable department id of an event document."""
+    return str(ev.get('department') or ev.get('dept_id') or '')
+
+
+# -------------------- Migration --------------------
+def _migrate_partition(db, query, event_depts: Dict[str, str], delete: bool) -> Dict[str, Any]:
+    per_doc = 2 if delete else 1
+    result = {'copied': 0, 'deleted': 0, 'skipped': []}
+    batch, writes = db.batch(), 0
+    for doc in query.stream():
+        reg = doc.to_dict() or {}
+        event_id = str(reg.get('event_id') or '').strip()
+        if not event_id:
+            result['skipped'].append(doc.id)
+            continue
+        reg['event_id'] = event_id
+        reg['dept_id'] = reg.get('dept_id') or event_depts.get(event_id, '')
+        batch.set(registration_ref(db, event_id, doc.id), reg)
+        if delete:
+            batch.delete(doc.reference)
+        writes += per_doc
+        result['copied'] += 1
+        result['deleted'] += int(delete)
+        if writes + per_doc > _BATCH_WRITES:
+            batch.commit()
+            batch, writes = db.batch(), 0
+    if writes:
+        batch.commit()
+    return result
+
+
+def migrate(db, workers: int = 8, delete: bool = False) -> Dict[str, Any]:
+    """Copy (and with `delete`, move) every `regists` document into its event partition.
+
+    The old collection is split into partition cursors by Firestore, and
+    `workers` threads each stream one partition and commit their own batches.
+    Documents without an event_id are left in place and reported.
+    """
+    event_depts = {doc.id: event_department(doc.to_dict() or {}) for doc in db.collection('events').stream()}
+    # Several partitions per worker evens out uneven partition sizes.
+    partitions = [p.query() for p in db.collection_group(LEGACY_COLLECTION).get_partitions(workers * 4)]
+    totals = {'partitions': len(partitions), 'copied': 0, 'deleted': 0, 'skipped': []}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(lambda q: _migrate_partition(db, q, event_depts, delete), partitions):
+            totals['copied'] += result['copied']
+            totals['deleted'] += result['deleted']
+            totals['skipped'].extend(result['skipped'])
+    return totals
+
+
+def main(argv: List[str]) -> int:
+    if '--migrate' not in argv:
+        print(__doc__)
+        return 0
+    workers = 8
+    if '--workers' in argv:
+        workers = int(argv[argv.index('--workers') + 1])
+    from app import db
+
+    totals = migrate(db, workers=workers, delete='--delete' in argv)
+    print(f"[registrations] {totals['copied']} copied, {totals['deleted']} deleted "
+          f"from {totals['partitions']} partition(s).")
+    for reg_id in totals['skipped']:
+        print(f'[registrations] Skipped {reg_id}: no event_id')
+    return 1 if totals['skipped'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
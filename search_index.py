@@ -0,0 +1,162 @@
+"""In-memory event search for Tantra25.
+
+Keeps an inverted index (term -> {event_id: weight}) over event name,
+description, venue and department name, plus a sorted term list used for
+prefix lookups with bisect. The index is updated incrementally from the
+shared catalog: only events whose searchable fields changed are re-indexed.
+"""
+
+import bisect
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Relative weight of a term depending on the field it came from.
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'department': 2.0,
+    'venue': 1.5,
+    'description': 1.0,
+}
+# Prefix matches rank below whole-word matches.
+PREFIX_FACTOR = 0.5
+
+
+def tokenize(text) -> List[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class EventSearchIndex:
+    """Inverted + prefix index over the events of a catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}     # term -> {event_id: weight}
+        self._terms = []        # sorted list of postings keys
+        self._docs = {}         # event_id -> (signature, terms, summary)
+        self.version = None
+
+    def update(self, catalog):
+        """Re-index the events that were added, changed or removed in catalog."""
+        dept_names = {str(d.get('id')): d.get('name', '') for d in catalog.departments}
+        with self._lock:
+            seen = set()
+            terms_dirty = False
+            for ev in catalog.events:
+                eid = str(ev.get('id'))
+                seen.add(eid)
+                dept_name = dept_names.get(str(ev.get('department', '')), '')
+                signature = (ev.get('name'), ev.get('description'), ev.get('venue'), dept_name,
+                             ev.get('status'), ev.get('date'), ev.get('department'),
+                             ev.get('image_url'), ev.get('time'))
+                old = self._docs.get(eid)
+                if old is not None and old[0] == signature:
+                    continue
+                if old is not None:
+                    terms_dirty |= self._remove(eid, old[1])
+                weights = self._weights(ev, dept_name)
+                for term, weight in weights.items():
+                    posting = self._postings.get(term)
+                    if posting is None:
+                        posting = self._postings[term] = {}
+                        terms_dirty = True
+                    posting[eid] = weight
+                self._docs[eid] = (signature, tuple(weights), self._summary(ev, dept_name))
+            for eid in [e for e in self._docs if e not in seen]:
+                terms_dirty |= self._remove(eid, self._docs.pop(eid)[1])
+            if terms_dirty:
+                self._terms = sorted(self._postings)
+            self.version = catalog.version
+
+    def search(self, q: str = '', dept: str = None, status: str = None, date: str = None,
+               page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """Return one page of ranked results plus the total hit count."""
+        words = tokenize(q)
+        with self._lock:
+            if words:
+                scores = None
+                for i, word in enumerate(words):
+                    # The last word is still being typed, so it also matches as a prefix.
+                    word_scores = self._match(word, prefix=(i == len(words) - 1))
+                    if scores is None:
+                        scores = word_scores
+                    else:
+                        scores = {eid: s + word_scores[eid] for eid, s in scores.items() if eid in word_scores}
+                    if not scores:
+                        break
+            else:
+                scores = {eid: 0.0 for eid in self._docs}
+
+            hits = []
+            for eid, score in scores.items():
+                summary = self._docs[eid][2]
+                if dept and summary['department'] != dept:
+                    continue
+                if status and str(summary['status']) != status:
+                    continue
+                if date and summary['date'] != date:
+                    continue
+                hits.append((score, summary))
+
+        hits.sort(key=lambda h: (-h[0], (h[1]['name'] or '').lower()))
+        per_page = max(1, min(per_page, 100))
+        page = max(1, page)
+        start = (page - 1) * per_page
+        results = [dict(summary, score=round(score, 3)) for score, summary in hits[start:start + per_page]]
+        return {'results': results, 'total': len(hits), 'page': page, 'per_page': per_page,
+                'version': self.version}
+
+    def _match(self, word: str, prefix: bool) -> Dict[str, float]:
+        scores = dict(self._postings.get(word, {}))
+        if prefix:
+            i = bisect.bisect_left(self._terms, word)
+            while i < len(self._terms) and self._terms[i].startswith(word):
+                term = self._terms[i]
+                i += 1
+                if term == word:
+                    continue
+                for eid, weight in self._postings[term].items():
+                    partial = weight * PREFIX_FACTOR
+                    if partial > scores.get(eid, 0.0):
+                        scores[eid] = partial
+        return scores
+
+    def _remove(self, eid: str, terms: Tuple[str, ...]) -> bool:
+        emptied = False
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(eid, None)
+            if not posting:
+                del self._postings[term]
+                emptied = True
+        return emptied
+
+    @staticmethod
+    def _weights(ev: Dict[str, Any], dept_name: str) -> Dict[str, float]:
+        weights = {}
+        fields = (('name', ev.get('name')), ('description', ev.get('description')),
+                  ('venue', ev.get('venue')), ('department', dept_name))
+        for field, text in fields:
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + FIELD_WEIGHTS[field]
+        return weights
+
+    @staticmethod
+    def _summary(ev: Dict[str, Any], dept_name: str) -> Dict[str, Any]:
+        return {
+            'id': str(ev.get('id')),
+            'name': ev.get('name'),
+            'date': ev.get('date', ''),
+            'time': ev.get('time', ''),
+            'venue': ev.get('venue', ''),
+            'image_url': ev.get('image_url', ''),
+            'status': ev.get('status', 1),
+            'department': ev.get('department', ''),
+            'dept_name': dept_name,
+        }
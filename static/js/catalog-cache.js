@@ -0,0 +1,87 @@
+// Persistent local copy of /api/data, kept current with ?since= deltas.
+// Pages render from the stored copy immediately and then ask the server only
+// for what changed since that copy's version (usually nothing).
+const TantraCatalog = (() => {
+    const PREFIX = 'tantra:catalog:';
+
+    function read(query) {
+        try {
+            return JSON.parse(localStorage.getItem(PREFIX + query));
+        } catch (err) {
+            return null;
+        }
+    }
+
+    function write(query, data) {
+        try {
+            localStorage.setItem(PREFIX + query, JSON.stringify(data));
+        } catch (err) {
+            // Storage full or disabled (private mode): keep working without the cache
+        }
+    }
+
+    // Replace changed items in place, append new ones and drop deleted ids
+    function merge(items, changed, deleted) {
+        const gone = new Set((deleted || []).map(String));
+        const updates = new Map((changed || []).map(item => [String(item.id), item]));
+        const merged = [];
+        (items || []).forEach(item => {
+            const id = String(item.id);
+            if (gone.has(id)) return;
+            if (updates.has(id)) {
+                merged.push(updates.get(id));
+                updates.delete(id);
+            } else {
+                merged.push(item);
+            }
+        });
+        updates.forEach(item => merged.push(item));
+        return merged;
+    }
+
+    // Stored copy for this query, or null
+    function cached(query) {
+        const data = read(query);
+        return data && Array.isArray(data.events) && Array.isArray(data.departments) ? data : null;
+    }
+
+    // Bring the stored copy up to date. Resolves to { data, changed } or null if the server is unreachable.
+    async function sync(query) {
+        const local = cached(query);
+        let url = `/api/data?${query}`;
+        if (local && local.version) {
+            url += `&since=${encodeURIComponent(local.version)}&epoch=${encodeURIComponent(local.epoch || '')}`;
+        }
+        let body;
+        try {
+            const response = await fetch(url);
+            if (!response || !response.ok) return null;
+            body = await response.json();
+        } catch (err) {
+            return null;
+        }
+
+        if (body.delta && local) {
+            const deleted = body.deleted || {};
+            const changed = body.departments.length + body.events.length +
+                (deleted.departments || []).length + (deleted.events || []).length > 0;
+            if (!changed && body.version === local.version) {
+                return { data: local, changed: false };
+            }
+            const data = {
+                version: body.version,
+                epoch: body.epoch,
+                departments: merge(local.departments, body.departments, deleted.departments),
+                events: merge(local.events, body.events, deleted.events)
+            };
+            write(query, data);
+            return { data, changed };
+        }
+
+        // Full body: first visit, or the stored version is too old to patch
+        if (body.version) write(query, body);
+        return { data: body, changed: true };
+    }
+
+    return { cached, sync };
+})();
@@ -113,20 +113,39 @@ window.testEvents = testEvents;
 window.testData = testData;
 window.inspectEventCards = inspectEventCards;
 
-// Load data from server or fallback to static JSON, then defaults
+// Summary mode: only the fields needed to draw cards and tabs.
+// Full event details are fetched from /event/<id> when a card is flipped.
+const CATALOG_QUERY = 'mode=summary';
+// Set when the page was drawn from the local copy and still needs the server delta
+let catalogNeedsSync = false;
+
+// Load data from the local copy or server, fallback to static JSON, then defaults
 async function loadData() {
     try {
         let data = null;
 
-        // Try server API first
-        try {
-            const response = await fetch('/api/data');
-            if (response && response.ok) {
-                data = await response.json();
+        // Render from the stored copy without waiting for the network; syncCatalog() updates it after
+        if (typeof TantraCatalog !== 'undefined') {
+            data = TantraCatalog.cached(CATALOG_QUERY);
+            catalogNeedsSync = !!data;
+        }
+
+        // Try server API next
+        if (!data) {
+            try {
+                if (typeof TantraCatalog !== 'undefined') {
+                    const result = await TantraCatalog.sync(CATALOG_QUERY);
+                    data = result ? result.data : null;
+                } else {
+                    const response = await fetch(`/api/data?${CATALOG_QUERY}`);
+                    if (response && response.ok) {
+                        data = await response.json();
+                    }
+                }
+            } catch (err) {
+                // server not available or network error; we'll try static JSON next
+                data = null;
             }
-        } catch (err) {
-            // server not available or network error; we'll try static JSON next
-            data = null;
         }
 
         // If server data not available, try static JSON (works when opened via file://)
@@ -169,6 +188,16 @@ async function loadData() {
     }
 }
 
+// Apply the server delta to the stored copy; re-render only if something changed
+async function syncCatalog() {
+    const result = await TantraCatalog.sync(CATALOG_QUERY);
+    if (!result || !result.changed) return;
+    events = result.data.events || [];
+    departments = result.data.departments || [];
+    console.log('Catalog updated:', events.length, 'events,', departments.length, 'departments');
+    updatePageContent();
+}
+
 // Default data in case JSON fails to load
 function getDefaultEvents() {
     return [
@@ -446,6 +475,17 @@ function renderEvents() {
 
     console.log('Filtered events count:', filteredEvents.length);
 
+    // First render after a server-rendered page: bind the cards already in the
+    // DOM instead of rebuilding them (only valid for the department they were rendered for)
+    const ssrDepartment = eventsContainer.dataset.ssrDepartment;
+    if (ssrDepartment !== undefined) {
+        delete eventsContainer.dataset.ssrDepartment;
+        if (ssrDepartment === currentDepartment && hydrateEventCards(filteredEvents)) {
+            console.log('Server-rendered events hydrated');
+            return;
+        }
+    }
+
     // When filtered by department, show only the events grid (no department card/header)
     if (currentDepartment !== 'all' && filteredEvents.length > 0) {
         eventsContainer.innerHTML = `
@@ -591,7 +631,7 @@ function createEventCard(event) {
       box-shadow: 0 2px 6px rgba(0,0,0,0.3);
     ">
       <i class="fas fa-trophy" style="color: #ffd700;"></i>
-      Prize: ${event.prize || '—'}
+      Prize: <span class="event-prize">${event.prize || '—'}</span>
     </span>
 
     <!-- 👤 Coordinator -->
@@ -600,7 +640,7 @@ function createEventCard(event) {
         <i class="fas fa-user" style="color: #7dd3fc;"></i>
         <strong>Coordinator</strong>
       </span>
-      <span style="padding-left: 22px; color: #e0e7ff;">${event.coordinator || ''}</span>
+      <span class="event-coordinator" style="padding-left: 22px; color: #e0e7ff;">${event.coordinator || ''}</span>
     </div>
 
     <!-- ☎ Phone -->
@@ -609,7 +649,7 @@ function createEventCard(event) {
         <i class="fas fa-phone" style="color: #7dd3fc;"></i>
         <strong>Phone</strong>
       </span>
-      <span style="padding-left: 22px; color: #e0e7ff;">${event.coordinatorPhone || ''}</span>
+      <span class="event-coordinator-phone" style="padding-left: 22px; color: #e0e7ff;">${event.coordinatorPhone || ''}</span>
     </div>
 
     <!-- 📍 Venue -->
@@ -618,13 +658,13 @@ function createEventCard(event) {
         <i class="fas fa-map-marker-alt" style="color: #7dd3fc;"></i>
         <strong>Venue</strong>
       </span>
-      <span style="padding-left: 22px; color: #e0e7ff;">${event.venue || ''}</span>
+      <span class="event-venue" style="padding-left: 22px; color: #e0e7ff;">${event.venue || ''}</span>
     </div>
 
     <!-- ⏰ Time -->
     <div style="display: flex; align-items: center; gap: 6px;">
       <i class="fas fa-clock" style="color: #7dd3fc;"></i>
-      <strong>Time:</strong> <span style="color: #e0e7ff;">${event.time || ''}</span>
+      <strong>Time:</strong> <span class="event-time" style="color: #e0e7ff;">${event.time || ''}</span>
     </div>
 
   </div>
@@ -639,13 +679,31 @@ function createEventCard(event) {
         </div>
         `;
 
-    // Flip logic
+    bindEventCard(card, event);
+    return card;
+}
+
+// Attach the bindings of a card already in the DOM to the events shown in it.
+// Returns false (caller renders from scratch) if the cards do not match the events.
+function hydrateEventCards(filteredEvents) {
+    const cards = eventsContainer.querySelectorAll('.event-card[data-event-id]');
+    if (cards.length !== filteredEvents.length) return false;
+    const byId = new Map(filteredEvents.map(event => [String(event.id), event]));
+    if (!Array.prototype.every.call(cards, card => byId.has(card.dataset.eventId))) return false;
+    cards.forEach(card => bindEventCard(card, byId.get(card.dataset.eventId)));
+    return true;
+}
+
+// Flip behaviour of an event card
+function bindEventCard(card, event) {
     const inner = card.querySelector('.flip-card-inner');
     const detailsBtns = card.querySelectorAll('.details-btn');
     // Only flip to back when clicking Details button
     detailsBtns.forEach(btn => {
         btn.addEventListener('click', e => {
             e.stopPropagation();
+            // The list is loaded in summary mode; fetch the full record on first flip
+            loadEventDetails(event, card);
             // On iOS we add a helper class and force a repaint to avoid back/front overlap
             inner.classList.add('flipped');
             if (isIOS) {
@@ -694,7 +752,34 @@ function createEventCard(event) {
         card.classList.remove('card-hidden');
         card.classList.add('card-visible');
     });
-    return card;
+}
+
+// Fetch the full event record (description, venue, time, prize...) once and
+// fill the back face of its card
+async function loadEventDetails(event, card) {
+    if (!event || event._detailsLoaded) return;
+    event._detailsLoaded = true;
+    try {
+        const response = await fetch(`/event/${encodeURIComponent(event.id)}`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        Object.assign(event, data.event || {});
+    } catch (err) {
+        // Keep whatever the summary had; allow a retry on the next flip
+        event._detailsLoaded = false;
+        console.warn('Failed to load event details:', err);
+        return;
+    }
+    const setText = (selector, value) => {
+        const el = card.querySelector(selector);
+        if (el) el.textContent = value || '';
+    };
+    setText('.event-prize', event.prize || '—');
+    setText('.event-coordinator', event.coordinator);
+    setText('.event-coordinator-phone', event.coordinatorPhone);
+    setText('.event-venue', event.venue);
+    setText('.event-time', event.time);
+    setText('.event-description', event.description);
 }
 
 // Format date for display
@@ -1250,6 +1335,10 @@ async function init() {
     setupSmoothScrolling();
     initScrollAnimations();
 
+    if (catalogNeedsSync) {
+        syncCatalog();
+    }
+
     console.log('=== APPLICATION INITIALIZED SUCCESSFULLY ===');
     console.log('Current department:', currentDepartment);
 }
@@ -499,19 +499,36 @@ window.addEventListener('resize', () => {
         }
     }, 250);
 });
+// The home page only needs department cards and per-department event counts
+const CATALOG_QUERY = 'mode=summary&fields=id,department';
+// Set when the page was drawn from the local copy and still needs the server delta
+let catalogNeedsSync = false;
+
 // Load data from JSON file
 async function loadData() {
     try {
-        // Try server API first (Flask). If unavailable, fall back to the static JSON file.
+        // Render from the stored copy first (no network wait); syncCatalog() applies the server delta after.
+        // Otherwise try the server API (Flask), and if unavailable fall back to the static JSON file.
         let data = null;
-        try {
-            const response = await fetch('/api/data');
-            if (response && response.ok) {
-                data = await response.json();
+        if (typeof TantraCatalog !== 'undefined') {
+            data = TantraCatalog.cached(CATALOG_QUERY);
+            catalogNeedsSync = !!data;
+        }
+        if (!data) {
+            try {
+                if (typeof TantraCatalog !== 'undefined') {
+                    const result = await TantraCatalog.sync(CATALOG_QUERY);
+                    data = result ? result.data : null;
+                } else {
+                    const response = await fetch(`/api/data?${CATALOG_QUERY}`);
+                    if (response && response.ok) {
+                        data = await response.json();
+                    }
+                }
+            } catch (err) {
+                // API fetch failed (server not running or network); we'll try static JSON below
+                data = null;
             }
-        } catch (err) {
-            // API fetch failed (server not running or network); we'll try static JSON below
-            data = null;
         }
 
         if (!data) {
@@ -535,6 +552,15 @@ async function loadData() {
     }
 }
 
+// Apply the server delta to the stored copy; re-render only if something changed
+async function syncCatalog() {
+    const result = await TantraCatalog.sync(CATALOG_QUERY);
+    if (!result || !result.changed) return;
+    events = result.data.events || [];
+    departments = result.data.departments || [];
+    updatePageContent();
+}
+
 // Default data in case JSON fails to load
 function getDefaultEvents() {
     return [
@@ -673,34 +699,42 @@ function updatePageContent() {
 function renderDepartments() {
     const departmentsContainer = document.getElementById('departments-container');
     if (!departmentsContainer) return;
-    
-    departmentsContainer.innerHTML = departments.map(dept => {
-        const departmentEvents = events.filter(event => event.department === dept.id);
-        return `
-            <a href="events.html?department=${dept.id}" class="department-card" data-department="${dept.id}">
-                <div class="department-icon" style="color: ${dept.color}">
-                    <i class="${dept.icon}"></i>
-                </div>
-                <h3>${dept.name}</h3>
-                <p>${dept.description}</p>
-                <div class="department-stats">
-                    <span class="event-count">${departmentEvents.length} Events</span>
-                </div>
-            </a>
-        `;
-    }).join('');
+
+    // Cards rendered by the server are already visible: keep them on first render
+    const serverRendered = departmentsContainer.dataset.ssr !== undefined;
+    if (serverRendered) {
+        delete departmentsContainer.dataset.ssr;
+    } else {
+        departmentsContainer.innerHTML = departments.map(dept => {
+            const departmentEvents = events.filter(event => event.department === dept.id);
+            return `
+                <a href="events.html?department=${dept.id}" class="department-card" data-department="${dept.id}">
+                    <div class="department-icon" style="color: ${dept.color}">
+                        <i class="${dept.icon}"></i>
+                    </div>
+                    <h3>${dept.name}</h3>
+                    <p>${dept.description}</p>
+                    <div class="department-stats">
+                        <span class="event-count">${departmentEvents.length} Events</span>
+                    </div>
+                </a>
+            `;
+        }).join('');
+    }
 
     // Animate department cards with GSAP
     const cards = document.querySelectorAll('.department-card');
-    gsap.set(cards, {opacity: 0, y: 60, scale: 0.95});
-    gsap.to(cards, {
-        opacity: 1,
-        y: 0,
-        scale: 1,
-        duration: 0.8,
-        stagger: 0.12,
-        ease: 'power3.out'
-    });
+    if (!serverRendered) {
+        gsap.set(cards, {opacity: 0, y: 60, scale: 0.95});
+        gsap.to(cards, {
+            opacity: 1,
+            y: 0,
+            scale: 1,
+            duration: 0.8,
+            stagger: 0.12,
+            ease: 'power3.out'
+        });
+    }
 
     // Add uneven float animation delays for each card
     cards.forEach((card, i) => {
@@ -853,6 +887,10 @@ async function init() {
     setupSmoothScrolling();
     initScrollAnimations();
     setActiveNavigation();
+
+    if (catalogNeedsSync) {
+        syncCatalog();
+    }
 }
 
 // Small mobile-only micro animations
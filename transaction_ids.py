@@ -0,0 +1,151 @@
+"""Payment transaction id uniqueness for Tantra25 registrations.
+
+Every registration that carries a UPI transaction id also creates a
+reservation document `transaction_ids/<TXID>` in the same atomic batch.
+`batch.create` fails if the reservation already exists, so one transaction id
+can back at most one registration.
+
+Registrations saved before reservations existed are checked by the
+reconciliation job in this module, which streams all registrations once
+and reports every transaction id used more than once:
+
+    python transaction_ids.py            # report conflicts
+    python transaction_ids.py --backfill # also reserve ids for old registrations
+"""
+
+import json
+import os
+import sys
+import tempfile
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+from registrations import all_registrations
+
+TX_COLLECTION = 'transaction_ids'
+
+
+def normalize_tx(tx: str) -> str:
+    """Canonical reservation key: UPI ids are case-insensitive."""
+    return (tx or '').strip().upper()
+
+
+def reservation_ref(db, tx: str):
+    return db.collection(TX_COLLECTION).document(normalize_tx(tx))
+
+
+def reserve_in_batch(batch, db, tx: str, reg_id: str, registration: Dict[str, Any]):
+    """Add the reservation for `tx` to `batch`; the commit fails if it is already taken."""
+    batch.create(reservation_ref(db, tx), {
+        'registration_id': reg_id,
+        'event_id': registration.get('event_id', ''),
+        'email': registration.get('email', ''),
+        'created_at': datetime.utcnow(),
+    })
+
+
+# -------------------- Reconciliation --------------------
+def find_duplicates(db, partitions: int = 16) -> Iterator[Dict[str, Any]]:
+    """Stream all registrations once and yield one conflict per transaction id used twice or more
+    (outside a single batch-registered team).
+
+    Rows are spilled to `partitions` temp files by crc32(tx), then each
+    partition is grouped in memory on its own, so peak memory is roughly
+    1/partitions of the collection.
+    """
+    with tempfile.TemporaryDirectory(prefix='tantra_tx_') as tmp:
+        paths = [os.path.join(tmp, f'part_{i}.jsonl') for i in range(partitions)]
+        files = [open(p, 'w', encoding='utf-8') for p in paths]
+        try:
+            for doc in all_registrations(db).stream():
+                reg = doc.to_dict() or {}
+                tx = normalize_tx(reg.get('transaction_id'))
+                if not tx:
+                    continue
+                row = {
+                    'id': doc.id,
+                    'tx': tx,
+                    'name': reg.get('name', ''),
+                    'email': reg.get('email', ''),
+                    'event_id': reg.get('event_id', ''),
+                    'event_name': reg.get('event_name', ''),
+                    'registration_date': str(reg.get('registration_date', '')),
+                    'team_id': reg.get('team_id', ''),
+                }
+                part = zlib.crc32(tx.encode('utf-8')) % partitions
+                files[part].write(json.dumps(row) + '\n')
+        finally:
+            for f in files:
+                f.close()
+
+        for path in paths:
+            groups = {}
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    row = json.loads(line)
+                    groups.setdefault(row['tx'], []).append(row)
+            for tx, rows in groups.items():
+                # One payment shared by the members of a single team is not a conflict.
+                teams = {r['team_id'] for r in rows}
+                if len(rows) > 1 and not (len(teams) == 1 and '' not in teams):
+                    rows.sort(key=lambda r: r['registration_date'])
+                    yield {'transaction_id': tx, 'count': len(rows), 'registrations': rows}
+
+
+def backfill_reservations(db) -> int:
+    """Reserve every transaction id already registered for its earliest registration.
+
+    Returns the number of reservations written. Existing reservations are
+    left untouched.
+    """
+    seen = set()
+    written = 0
+    batch = db.batch()
+    pending = 0
+    for doc in all_registrations(db).order_by('registration_date').stream():
+        reg = doc.to_dict() or {}
+        tx = normalize_tx(reg.get('transaction_id'))
+        if not tx or tx in seen:
+            continue
+        seen.add(tx)
+        ref = reservation_ref(db, tx)
+        if ref.get().exists:
+            continue
+        batch.set(ref, {
+            'registration_id': doc.id,
+            'event_id': reg.get('event_id', ''),
+            'email': reg.get('email', ''),
+            'created_at': datetime.utcnow(),
+            'backfilled': True,
+        })
+        pending += 1
+        written += 1
+        if pending >= 400:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    return written
+
+
+def main(argv: List[str]) -> int:
+    from app import db
+
+    conflicts = 0
+    for conflict in find_duplicates(db):
+        conflicts += 1
+        print(f"[tx] {conflict['transaction_id']} used {conflict['count']} times:")
+        for r in conflict['registrations']:
+            print(f"      {r['id']}  {r['registration_date']}  {r['email']}  {r['event_name']}")
+    print(f'[tx] {conflicts} duplicated transaction id(s) found.')
+
+    if '--backfill' in argv:
+        written = backfill_reservations(db)
+        print(f'[tx] Backfilled {written} reservation(s).')
+    return 1 if conflicts else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
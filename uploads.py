@@ -0,0 +1,115 @@
+"""Content-addressed storage for admin uploads (logos, QR codes, event images).
+
+Uploads are stored as `<sha256 prefix><ext>` instead of under their original
+name, so two different files called `image.jpg` no longer overwrite each other
+and the same file uploaded twice is stored once. Because a name never changes
+content, these files are served with an `immutable` Cache-Control.
+
+Firestore documents reference the files through their URLs. `collect_garbage`
+deletes hashed files that no department or event references any more:
+
+    python uploads.py --gc
+"""
+
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Iterable, List
+
+from werkzeug.utils import secure_filename
+
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{32}\.[a-z0-9]{1,8}$')
+
+# URL fields of department/event documents that point at uploaded files.
+URL_FIELDS = ('logo_url', 'qr_url', 'image_url', 'payment_qr_url')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_CHUNK = 64 * 1024
+
+
+def save_upload(file_storage, folder: str) -> str:
+    """Store an uploaded file under its content hash in `folder` and return the file name."""
+    ext = os.path.splitext(secure_filename(file_storage.filename or ''))[1].lower() or '.bin'
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(prefix='.upload_', dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file_storage.stream.read(_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        filename = digest.hexdigest()[:32] + ext
+        target = os.path.join(folder, filename)
+        try:
+            # Same content already stored: keep the existing file, but refresh its
+            # mtime so the orphan GC's min_age protects it until the doc is saved.
+            os.utime(target, None)
+            os.unlink(tmp)
+        except FileNotFoundError:
+            os.replace(tmp, target)
+        return filename
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def is_hashed_name(filename: str) -> bool:
+    return bool(HASHED_NAME_RE.match(filename))
+
+
+def referenced_names(docs: Iterable[dict]) -> set:
+    """File names referenced by the URL fields of the given documents."""
+    names = set()
+    for doc in docs:
+        for field in URL_FIELDS:
+            url = doc.get(field)
+            if url:
+                names.add(str(url).rstrip('/').rsplit('/', 1)[-1])
+    return names
+
+
+def collect_garbage(folders: Iterable[str], docs: Iterable[dict], min_age: float = 3600.0) -> List[str]:
+    """Delete hashed uploads not referenced by `docs`; return the removed paths.
+
+    Files younger than `min_age` seconds are kept, so an upload whose document
+    has not been written yet is never collected.
+    """
+    keep = referenced_names(docs)
+    now = time.time()
+    removed = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if not is_hashed_name(name) or name in keep:
+                continue
+            path = os.path.join(folder, name)
+            try:
+                if now - os.path.getmtime(path) < min_age:
+                    continue
+                os.unlink(path)
+                removed.append(path)
+            except OSError:
+                continue
+    return removed
+
+
+if __name__ == '__main__':
+    if '--gc' not in sys.argv[1:]:
+        print(__doc__)
+        sys.exit(0)
+    from app import app, db
+
+    docs = []
+    for coll in ('departments', 'events'):
+        docs.extend(d.to_dict() or {} for d in db.collection(coll).stream())
+    folders = [app.config['UPLOAD_LOGO_FOLDER'], app.config['UPLOAD_QR_FOLDER'], app.config['UPLOAD_EVENT_FOLDER']]
+    for path in collect_garbage(folders, docs):
+        print(f'[uploads] Removed {path}')